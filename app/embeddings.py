@@ -1,11 +1,21 @@
+import fcntl
+import functools
 import logging
 import os
+import re
+import tempfile
 import numpy as np
-from app.models import db, Skill
-from flask import Flask
+from app.models import db, Skill, ensure_schema
+from app.lexical import LexicalIndex
+from flask import Flask, has_app_context
 import faiss
 import requests
+import hashlib
 import json
+import threading
+import uuid
+from collections import OrderedDict, namedtuple
+from contextlib import contextmanager
 from concurrent.futures import ThreadPoolExecutor, as_completed
 import time
 
@@ -31,14 +41,151 @@ app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 db.init_app(app)
 
 OLLAMA_URL = "http://localhost:11434/api"
+DESCRIPTION_MODEL = "phi3"
+EMBEDDING_MODEL = "mxbai-embed-large"
+SINGLE_DESCRIPTION_PROMPT = "Describe the skill '{skill}' in one sentence."
 
-def check_ollama_availability():
+EMBEDDINGS_DIR = os.path.join(os.path.dirname(__file__), '..', 'data', 'embeddings')
+INDEX_PATH = os.path.join(EMBEDDINGS_DIR, 'skill_index.faiss')
+SKILLS_PATH = os.path.join(EMBEDDINGS_DIR, 'skills.json')
+# Raw L2-normalized vectors, row i aligned with skills.json[i]
+VECTORS_PATH = os.path.join(EMBEDDINGS_DIR, 'skill_vectors.npy')
+# Written last by every rebuild; serving processes reload when its version changes
+INDEX_VERSION_PATH = os.path.join(EMBEDDINGS_DIR, 'index_version.json')
+# Held by whichever thread or worker is rebuilding, from gather to publish
+INDEX_LOCK_PATH = os.path.join(EMBEDDINGS_DIR, '.index.lock')
+INDEX_POLL_SECONDS = 5
+# Map flat index codes instead of reading them, so workers share the page cache
+INDEX_READ_FLAGS = getattr(faiss, 'IO_FLAG_MMAP_IFC', faiss.IO_FLAG_MMAP) | faiss.IO_FLAG_READ_ONLY
+
+# Defaults for a first build; later builds keep whatever the published index uses
+# 'float32' lets index builds read the store zero-copy; 'float16' halves it on disk
+VECTOR_STORE_DTYPE = os.environ.get('SKILL_SWAP_VECTOR_DTYPE', 'float32')
+# 'flat' (exact IndexFlatIP) or 'sq8' (8-bit scalar-quantized, ~4x smaller)
+INDEX_TYPE = os.environ.get('SKILL_SWAP_INDEX_TYPE', 'flat')
+INDEX_ADD_CHUNK = 65536
+
+# Bounds on how long one pipeline run may spend waiting on Ollama: a fixed allowance
+# plus a per-skill share, so large catalogs still finish against a healthy server
+PIPELINE_DEADLINE_SECONDS = 120
+PIPELINE_SECONDS_PER_SKILL = 2
+BREAKER_FAILURE_THRESHOLD = 3
+BREAKER_RESET_SECONDS = 30
+FALLBACK_MAX_WORKERS = 3
+
+# Batched phi3 description generation
+DESCRIPTION_MAX_WORKERS = 3
+DESCRIPTION_TOKENS_PER_SKILL = 40
+BATCH_TOKEN_BUDGET = 512
+MAX_BATCH_SIZE = 20
+BATCH_DESCRIPTION_PROMPT = """Write a one-sentence description for each of these skills.
+Respond with a JSON object whose keys are the skill names exactly as given and whose values are the descriptions.
+Skills: {skills}"""
+
+description_stats = {}
+# Older Ollama servers answer 400 to a JSON-schema `format`; batches then fall back to
+# plain JSON mode for the rest of the process
+_batch_format = {"mode": 'schema'}
+
+
+class Deadline:
+    def __init__(self, seconds):
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self):
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self):
+        return self.remaining() <= 0
+
+    def timeout(self, cap):
+        return min(cap, self.remaining())
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold=BREAKER_FAILURE_THRESHOLD, reset_seconds=BREAKER_RESET_SECONDS):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at = None
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            # Half-open: let a probe through once the reset window has passed
+            if time.monotonic() - self.opened_at >= self.reset_seconds:
+                self.opened_at = time.monotonic()
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            if self.opened_at is not None:
+                logger.info("[OK] Ollama circuit breaker closed")
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.failures >= self.failure_threshold and self.opened_at is None:
+                logger.warning(f"Ollama circuit breaker opened after {self.failures} consecutive failures")
+                self.opened_at = time.monotonic()
+
+
+ollama_breaker = CircuitBreaker()
+
+def record_call_failure(deadline):
+    # A call cut short by the run's own deadline says nothing about Ollama's health
+    if deadline is None or not deadline.expired():
+        ollama_breaker.record_failure()
+
+class LastGoodCache:
+    # Bounded LRU of last good results, served while the breaker is open or the deadline has passed
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, default=None):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                return default
+            self._entries.move_to_end(key)
+            return value
+
+    def __setitem__(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+# Descriptions are short strings; embeddings are float32 rows (4 KB at 1024-d)
+DESCRIPTION_CACHE_MAX_ENTRIES = 20000
+EMBEDDING_CACHE_MAX_ENTRIES = 2048
+_description_cache = LastGoodCache(DESCRIPTION_CACHE_MAX_ENTRIES)
+_embedding_cache = LastGoodCache(EMBEDDING_CACHE_MAX_ENTRIES)
+
+# Digests reported by the last successful availability check
+model_digests = {}
+
+def check_ollama_availability(required=None):
     try:
         response = requests.get(f"{OLLAMA_URL}/tags", timeout=5)
         if response.status_code == 200:
             models = response.json().get("models", [])
             model_names = [m["name"].split(":")[0] for m in models]
-            required = ["phi3", "mxbai-embed-large"]
+            for m in models:
+                if m.get("digest"):
+                    model_digests[m["name"].split(":")[0]] = m["digest"]
+            required = required or [DESCRIPTION_MODEL, EMBEDDING_MODEL]
             missing = [m for m in required if m not in model_names]
 
             if missing:
@@ -54,81 +201,150 @@ def check_ollama_availability():
         logger.error(f"Ollama check failed: {str(e)}")
         return False
 
-def generate_batch_descriptions(skills, batch_size=5):
-    descriptions = {}
+def estimate_description_tokens(skill):
+    # Roughly 4 characters per token, plus the JSON key quoting and separators
+    return DESCRIPTION_TOKENS_PER_SKILL + len(skill) // 4 + 4
 
-    for i in range(0, len(skills), batch_size):
-        batch = skills[i:i + batch_size]
-        batch_text = "\n".join([f"{j + 1}. {skill}" for j, skill in enumerate(batch)])
+def tune_batch_size(skills, token_budget=BATCH_TOKEN_BUDGET):
+    if not skills:
+        return 1
+    average = sum(estimate_description_tokens(skill) for skill in skills) / len(skills)
+    return max(1, min(MAX_BATCH_SIZE, int(token_budget // average)))
 
-        logger.info(f"Generating descriptions for batch {i // batch_size + 1}/{(len(skills) + batch_size - 1) // batch_size}")
+def batch_response_format(batch, mode):
+    if mode == 'json':
+        return "json"
+    return {
+        "type": "object",
+        "properties": {skill: {"type": "string"} for skill in batch},
+        "required": batch
+    }
 
-        try:
-            url = f"{OLLAMA_URL}/generate"
-            headers = {"Content-Type": "application/json"}
-            data = {
-                "model": "phi3",
-                "prompt": f"""Provide brief descriptions for these skills (one sentence each):
-{batch_text}
-
-Format your response as:
-1. [Skill]: [Description]
-2. [Skill]: [Description]
-etc.""",
-                "stream": False,
-                "options": {
-                    "temperature": 0.1,
-                    "num_predict": 200,
-                    "top_k": 3,
-                    "top_p": 0.8
-                }
+def generate_description_batch(batch, deadline):
+    if deadline.expired() or not ollama_breaker.allow():
+        logger.warning(f"Skipping batch of {len(batch)}: deadline exceeded or Ollama circuit open")
+        return {}
+
+    try:
+        url = f"{OLLAMA_URL}/generate"
+        headers = {"Content-Type": "application/json"}
+        data = {
+            "model": DESCRIPTION_MODEL,
+            "prompt": BATCH_DESCRIPTION_PROMPT.format(skills=json.dumps(batch)),
+            "format": batch_response_format(batch, _batch_format["mode"]),
+            "stream": False,
+            "options": {
+                "temperature": 0.1,
+                "num_predict": sum(estimate_description_tokens(skill) for skill in batch) + 16,
+                "top_k": 3,
+                "top_p": 0.8
             }
+        }
 
-            response = requests.post(url, headers=headers, data=json.dumps(data), timeout=15)
-
-            if response.status_code == 200:
-                result = response.json()
-                batch_descriptions = result.get("response", "").strip()
-                lines = batch_descriptions.split('\n')
-                for line in lines:
-                    line = line.strip()
-                    if ':' in line and any(char.isdigit() for char in line[:5]):
-                        try:
-                            parts = line.split(':', 1)
-                            if len(parts) == 2:
-                                skill_part = parts[0].strip().split('.', 1)[-1].strip().strip('[]')
-                                desc_part = parts[1].strip()
-                                for skill in batch:
-                                    if skill.lower() in skill_part.lower() or skill_part.lower() in skill.lower():
-                                        descriptions[skill] = desc_part
-                                        break
-                        except:
-                            continue
-
-                logger.debug(f"Parsed {len([k for k in descriptions.keys() if k in batch])} descriptions from batch")
-            else:
-                logger.error(f"Batch description generation failed: {response.status_code}")
-                for skill in batch:
-                    descriptions[skill] = generate_single_description(skill)
-        except Exception as e:
-            logger.error(f"Error in batch description generation: {str(e)}")
-            for skill in batch:
-                descriptions[skill] = generate_single_description(skill)
+        response = requests.post(url, headers=headers, data=json.dumps(data), timeout=deadline.timeout(15))
+        if response.status_code == 400 and data["format"] != "json":
+            # Schema not supported by this server: not an outage, so the breaker is left alone
+            if _batch_format["mode"] != 'json':
+                logger.warning("Ollama rejected the JSON-schema format, switching batches to plain JSON mode")
+            _batch_format["mode"] = 'json'
+            data["format"] = batch_response_format(batch, 'json')
+            response = requests.post(url, headers=headers, data=json.dumps(data), timeout=deadline.timeout(15))
+        if response.status_code != 200:
+            ollama_breaker.record_failure()
+            logger.error(f"Batch description generation failed: {response.status_code}")
+            return {}
+
+        ollama_breaker.record_success()
+        parsed = json.loads(response.json().get("response", "") or "{}")
+        if not isinstance(parsed, dict):
+            logger.warning(f"Batch description response was not a JSON object: {type(parsed).__name__}")
+            return {}
+
+        descriptions = {}
+        for skill in batch:
+            description = parsed.get(skill)
+            if isinstance(description, str) and description.strip():
+                descriptions[skill] = description.strip()
+                _description_cache[skill] = descriptions[skill]
+
+        logger.debug(f"Parsed {len(descriptions)}/{len(batch)} descriptions from batch")
+        return descriptions
+    except ValueError as e:
+        logger.warning(f"Could not parse batch description JSON: {str(e)}")
+        return {}
+    except Exception as e:
+        record_call_failure(deadline)
+        logger.error(f"Error in batch description generation: {str(e)}")
+        return {}
+
+def pipeline_deadline_seconds(skill_count):
+    return PIPELINE_DEADLINE_SECONDS + skill_count * PIPELINE_SECONDS_PER_SKILL
 
-    for skill in skills:
-        if skill not in descriptions:
-            logger.warning(f"Missing description for {skill}, generating individually")
-            descriptions[skill] = generate_single_description(skill)
+def generate_batch_descriptions(skills, batch_size=None, deadline=None, max_workers=DESCRIPTION_MAX_WORKERS):
+    # Skills neither phi3 nor the cache could describe are left out of the result
+    deadline = deadline or Deadline(pipeline_deadline_seconds(len(skills)))
+    batch_size = batch_size or tune_batch_size(skills)
+    batches = [skills[i:i + batch_size] for i in range(0, len(skills), batch_size)]
+    descriptions = {}
+    start_time = time.time()
+
+    logger.info(f"Generating descriptions for {len(batches)} batches of up to {batch_size} using {max_workers} workers")
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for future in as_completed([executor.submit(generate_description_batch, batch, deadline) for batch in batches]):
+            descriptions.update(future.result())
+
+    missing = [skill for skill in skills if skill not in descriptions]
+    if missing:
+        logger.warning(f"Missing descriptions for {len(missing)} skills, generating individually")
+        descriptions.update(generate_fallback_descriptions(missing, deadline))
+    undescribed = len(skills) - len(descriptions)
 
+    elapsed = time.time() - start_time
+    description_stats.update({
+        "skills": len(skills),
+        "batch_size": batch_size,
+        "batches": len(batches),
+        "format_mode": _batch_format["mode"],
+        "fallback_calls": len(missing),
+        "fallback_rate": len(missing) / len(skills) if skills else 0.0,
+        "undescribed": undescribed,
+        "seconds": elapsed,
+        "descriptions_per_second": len(skills) / elapsed if elapsed > 0 else 0.0
+    })
+    logger.info(f"[OK] {len(skills)} descriptions in {elapsed:.2f}s "
+                f"({description_stats['descriptions_per_second']:.1f}/s), "
+                f"fallback calls: {len(missing)} ({description_stats['fallback_rate']:.0%}), "
+                f"format: {_batch_format['mode']}")
+    if undescribed:
+        logger.warning(f"{undescribed} skills could not be described")
+    return descriptions
+
+def generate_fallback_descriptions(skills, deadline, max_workers=FALLBACK_MAX_WORKERS):
+    descriptions = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        future_to_skill = {executor.submit(describe_skill, skill, deadline): skill for skill in skills}
+        for future in as_completed(future_to_skill):
+            description = future.result()
+            if description:
+                descriptions[future_to_skill[future]] = description
     return descriptions
 
-def generate_single_description(skill):
+def generate_single_description(skill, deadline=None):
+    # Queries fall back to the bare name; index builds use describe_skill and never do
+    return describe_skill(skill, deadline) or skill
+
+def describe_skill(skill, deadline=None):
+    # A fresh phi3 description, else the last good one, else None
+    if (deadline is not None and deadline.expired()) or not ollama_breaker.allow():
+        logger.debug(f"Serving cached description for {skill}")
+        return _description_cache.get(skill)
+
     try:
         url = f"{OLLAMA_URL}/generate"
         headers = {"Content-Type": "application/json"}
         data = {
-            "model": "phi3",
-            "prompt": f"Describe the skill '{skill}' in one sentence.",
+            "model": DESCRIPTION_MODEL,
+            "prompt": SINGLE_DESCRIPTION_PROMPT.format(skill=skill),
             "stream": False,
             "options": {
                 "temperature": 0.1,
@@ -136,122 +352,528 @@ def generate_single_description(skill):
                 "top_k": 3
             }
         }
-        response = requests.post(url, headers=headers, data=json.dumps(data), timeout=8)
+        timeout = deadline.timeout(8) if deadline is not None else 8
+        response = requests.post(url, headers=headers, data=json.dumps(data), timeout=timeout)
         if response.status_code == 200:
+            ollama_breaker.record_success()
             result = response.json()
-            return result.get("response", "").strip() or skill
-        return skill
+            description = result.get("response", "").strip()
+            if description:
+                _description_cache[skill] = description
+            return description or _description_cache.get(skill)
+        ollama_breaker.record_failure()
+        return _description_cache.get(skill)
     except Exception as e:
+        record_call_failure(deadline)
         logger.warning(f"Single description generation failed for {skill}: {str(e)}")
-        return skill
+        return _description_cache.get(skill)
 
-def generate_single_embedding(skill_description_pair):
+def generate_single_embedding(skill_description_pair, deadline=None, model=EMBEDDING_MODEL):
     skill, description = skill_description_pair
+    if (deadline is not None and deadline.expired()) or not ollama_breaker.allow():
+        logger.debug(f"Serving cached embedding for {skill}")
+        return skill, _embedding_cache.get((model, description))
+
     try:
         url = f"{OLLAMA_URL}/embeddings"
         headers = {"Content-Type": "application/json"}
         data = {
-            "model": "mxbai-embed-large",
+            "model": model,
             "prompt": description
         }
-        response = requests.post(url, headers=headers, data=json.dumps(data), timeout=15)
+        timeout = deadline.timeout(15) if deadline is not None else 15
+        response = requests.post(url, headers=headers, data=json.dumps(data), timeout=timeout)
         if response.status_code == 200:
+            ollama_breaker.record_success()
             result = response.json()
             embedding = result.get("embedding")
-            return (skill, embedding) if embedding else (skill, None)
-        return skill, None
+            if not embedding:
+                return skill, None
+            embedding = np.asarray(embedding, dtype=np.float32)
+            _embedding_cache[(model, description)] = embedding
+            return skill, embedding
+        ollama_breaker.record_failure()
+        return skill, _embedding_cache.get((model, description))
     except Exception as e:
+        record_call_failure(deadline)
         logger.error(f"Error generating embedding for {skill}: {str(e)}")
-        return skill, None
+        return skill, _embedding_cache.get((model, description))
+
+# Embedding backends. Ollama embeds the generated descriptions over HTTP; the
+# in-process backends embed skill names directly and need no Ollama server.
+EMBEDDING_BACKEND = os.environ.get('SKILL_SWAP_EMBEDDING_BACKEND', 'ollama')
+EMBEDDING_MAX_WORKERS = 3
+SENTENCE_TRANSFORMER_MODEL = "all-MiniLM-L6-v2"
+SENTENCE_TRANSFORMER_BATCH_SIZE = 64
+HASHING_DIMENSION = 256
+
+class OllamaBackend:
+    name = 'ollama'
+    uses_descriptions = True
 
-def generate_embeddings_optimized(skills, max_workers=3):
-    if not check_ollama_availability():
+    def __init__(self, model=EMBEDDING_MODEL, max_workers=EMBEDDING_MAX_WORKERS):
+        self.model = model
+        self.max_workers = max_workers
+
+    def available(self):
+        return check_ollama_availability([DESCRIPTION_MODEL, self.model])
+
+    def digest(self):
+        return model_digests.get(self.model)
+
+    def embed(self, texts, deadline=None):
+        # Rows are filled in place by position, so the result stays aligned with `texts`
+        embeddings_array = None
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            future_to_position = {
+                executor.submit(generate_single_embedding, (text, text), deadline, self.model): position
+                for position, text in enumerate(texts)
+            }
+            for i, future in enumerate(as_completed(future_to_position), 1):
+                text, embedding = future.result()
+                if embedding is None:
+                    logger.error(f"Embedding failed for {text}")
+                    return None
+                if embeddings_array is None:
+                    embeddings_array = np.empty((len(texts), len(embedding)), dtype=np.float32)
+                embeddings_array[future_to_position[future]] = embedding
+                logger.debug(f"[OK] Embedding {i}/{len(texts)}")
+        return embeddings_array
+
+class SentenceTransformerBackend:
+    name = 'sentence-transformers'
+    uses_descriptions = False
+
+    def __init__(self, model=SENTENCE_TRANSFORMER_MODEL, batch_size=SENTENCE_TRANSFORMER_BATCH_SIZE):
+        self.model = model
+        self.batch_size = batch_size
+        self._encoder = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        with self._lock:
+            if self._encoder is None:
+                from sentence_transformers import SentenceTransformer
+                self._encoder = SentenceTransformer(self.model, device='cpu')
+                logger.info(f"[OK] Loaded {self.model} in process")
+        return self._encoder
+
+    def available(self):
+        try:
+            self._load()
+            return True
+        except Exception as e:
+            logger.error(f"Sentence-transformers backend unavailable: {str(e)}")
+            return False
+
+    def digest(self):
+        return None
+
+    def embed(self, texts, deadline=None):
+        # One forward pass per batch instead of one request per text
+        return self._load().encode(
+            list(texts), batch_size=self.batch_size, convert_to_numpy=True, show_progress_bar=False
+        ).astype(np.float32, copy=False)
+
+class HashingBackend:
+    # Deterministic signed feature hashing over words and character trigrams;
+    # no model, no network, for tests and benchmarks
+    name = 'hashing'
+    uses_descriptions = False
+
+    def __init__(self, model=None, dimension=None):
+        # The model name records the dimension ("hash-256"), so an index's metadata
+        # is enough to rebuild a backend that embeds into the same space
+        match = re.fullmatch(r'hash-(\d+)', model) if model else None
+        if model and not match:
+            raise ValueError(f"Hashing model must look like 'hash-<dimension>', got {model!r}")
+        if match and dimension and int(match.group(1)) != dimension:
+            raise ValueError(f"Hashing model {model!r} does not match dimension {dimension}")
+        self.dimension = int(match.group(1)) if match else dimension or HASHING_DIMENSION
+        self.model = f"hash-{self.dimension}"
+        self._slots = {}
+
+    def available(self):
+        return True
+
+    def digest(self):
+        return None
+
+    def _slot(self, feature):
+        slot = self._slots.get(feature)
+        if slot is None:
+            value = int.from_bytes(hashlib.blake2b(feature.encode(), digest_size=8).digest(), 'little')
+            slot = self._slots[feature] = (value % self.dimension, 1.0 if value >> 63 else -1.0)
+        return slot
+
+    def embed(self, texts, deadline=None):
+        vectors = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        for row, text in enumerate(texts):
+            key = " ".join(text.lower().split())
+            padded = f" {key} "
+            features = key.split() + [padded[i:i + 3] for i in range(len(padded) - 2)]
+            for feature in features:
+                column, sign = self._slot(feature)
+                vectors[row, column] += sign
+        return vectors
+
+EMBEDDING_BACKENDS = {
+    backend.name: backend for backend in (OllamaBackend, SentenceTransformerBackend, HashingBackend)
+}
+_backend_instances = {}
+
+def get_embedding_backend(name=None, model=None):
+    name = name or EMBEDDING_BACKEND
+    if name not in EMBEDDING_BACKENDS:
+        raise ValueError(f"Unknown embedding backend {name!r}, expected one of {sorted(EMBEDDING_BACKENDS)}")
+    key = (name, model)
+    if key not in _backend_instances:
+        _backend_instances[key] = EMBEDDING_BACKENDS[name](model) if model else EMBEDDING_BACKENDS[name]()
+    return _backend_instances[key]
+
+def index_backend(metadata):
+    # Queries must be embedded by whatever built the index they search
+    fingerprint = metadata.get("fingerprint") or {}
+    return get_embedding_backend(fingerprint.get("embedding_backend", 'ollama'), fingerprint.get("embedding_model"))
+
+def generate_embeddings_optimized(skills, backend=None, deadline_seconds=None):
+    backend = backend or get_embedding_backend()
+    if not backend.available():
         return np.array([], dtype=np.float32), []
 
     try:
-        logger.info(f"Generating descriptions for {len(skills)} skills in batches...")
+        deadline = Deadline(deadline_seconds or pipeline_deadline_seconds(len(skills)))
         start_time = time.time()
-        descriptions = generate_batch_descriptions(skills)
+        texts = list(skills)
+        if backend.uses_descriptions:
+            logger.info(f"Generating descriptions for {len(skills)} skills in batches...")
+            descriptions = generate_batch_descriptions(skills, deadline=deadline)
+            if len(descriptions) < len(skills):
+                # Bare-name vectors would sit in the index next to description vectors
+                logger.error(f"Aborting: {len(skills) - len(descriptions)} skills have no description")
+                return np.array([], dtype=np.float32), []
+            texts = [descriptions[skill] for skill in skills]
+            logger.info(f"[OK] Description generation completed in {time.time() - start_time:.2f} seconds")
         desc_time = time.time() - start_time
-        logger.info(f"[OK] Description generation completed in {desc_time:.2f} seconds")
-
-        logger.info(f"Generating embeddings using {max_workers} workers...")
-        skill_description_pairs = [(skill, descriptions[skill]) for skill in skills]
-
-        embeddings = []
-        processed_skills = []
-
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            future_to_skill = {executor.submit(generate_single_embedding, pair): pair[0] for pair in skill_description_pairs}
-
-            for i, future in enumerate(as_completed(future_to_skill), 1):
-                skill_name = future_to_skill[future]
-                try:
-                    skill, embedding = future.result()
-                    if embedding:
-                        embeddings.append(embedding)
-                        processed_skills.append(skill)
-                        logger.info(f"[OK] Embedding {i}/{len(skills)}: {skill}")
-                    else:
-                        logger.error(f"Embedding failed for {skill}")
-                        return np.array([], dtype=np.float32), []
-                except Exception as e:
-                    logger.error(f"Embedding error for {skill_name}: {str(e)}")
-                    return np.array([], dtype=np.float32), []
-
-        if not embeddings:
+
+        logger.info(f"Generating embeddings with the {backend.name} backend ({backend.model})...")
+        embeddings_array = backend.embed(texts, deadline=deadline)
+        if embeddings_array is None or len(embeddings_array) != len(skills):
             logger.error("No embeddings generated")
             return np.array([], dtype=np.float32), []
 
-        embeddings_array = np.array(embeddings, dtype=np.float32)
         embedding_time = time.time() - start_time - desc_time
-        logger.info(f"[OK] Generated {len(embeddings)} embeddings in {embedding_time:.2f} seconds")
+        logger.info(f"[OK] Generated {len(embeddings_array)} embeddings in {embedding_time:.2f} seconds")
 
-        return embeddings_array, processed_skills
+        return embeddings_array, list(skills)
     except Exception as e:
         logger.error(f"Error in optimized embedding generation: {str(e)}")
         return np.array([], dtype=np.float32), []
 
-def build_faiss_index(embeddings):
+_index_lock_state = threading.local()
+
+@contextmanager
+def index_write_lock():
+    # flock conflicts between separate opens of the file, so this excludes other
+    # threads as well as other workers; re-entrant within one thread
+    depth = getattr(_index_lock_state, 'depth', 0)
+    if depth:
+        _index_lock_state.depth = depth + 1
+        try:
+            yield
+        finally:
+            _index_lock_state.depth -= 1
+        return
+
+    os.makedirs(EMBEDDINGS_DIR, exist_ok=True)
+    with open(INDEX_LOCK_PATH, 'a') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        _index_lock_state.depth = 1
+        try:
+            yield
+        finally:
+            _index_lock_state.depth = 0
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def holds_index_lock(fn):
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        with index_write_lock():
+            return fn(*args, **kwargs)
+    return wrapper
+
+def atomic_temp_path(path):
+    # Unique per call, and in the target directory so os.replace is a plain rename
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.", suffix='.tmp')
+    os.close(fd)
+    os.chmod(tmp_path, 0o644)
+    return tmp_path
+
+def discard_temp(tmp_path):
+    if tmp_path and os.path.exists(tmp_path):
+        os.remove(tmp_path)
+
+def save_vector_store(embeddings, path=VECTORS_PATH, dtype=VECTOR_STORE_DTYPE):
+    tmp_path = None
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = atomic_temp_path(path)
+        store = np.lib.format.open_memmap(tmp_path, mode='w+', dtype=dtype, shape=embeddings.shape)
+        store[:] = embeddings
+        store.flush()
+        del store
+        os.replace(tmp_path, path)
+        logger.info(f"[OK] Vector store saved to {path} ({embeddings.shape[0]}x{embeddings.shape[1]} {dtype})")
+        return True
+    except Exception as e:
+        logger.error(f"Error saving vector store: {str(e)}")
+        discard_temp(tmp_path)
+        return False
+
+def load_vector_store(path=VECTORS_PATH):
+    if not os.path.exists(path):
+        return None
+    try:
+        return np.load(path, mmap_mode='r')
+    except Exception as e:
+        logger.error(f"Error loading vector store: {str(e)}")
+        return None
+
+def create_faiss_index(dimension, index_type=INDEX_TYPE):
+    if index_type == 'flat':
+        return faiss.IndexFlatIP(dimension)
+    if index_type == 'sq8':
+        return faiss.IndexScalarQuantizer(dimension, faiss.ScalarQuantizer.QT_8bit, faiss.METRIC_INNER_PRODUCT)
+    raise ValueError(f"Unknown index type: {index_type}")
+
+def build_faiss_index(embeddings, index_type=INDEX_TYPE, index_path=INDEX_PATH):
+    tmp_path = None
     try:
         if embeddings.size == 0:
             return None
 
-        dimension = embeddings.shape[1]
-        logger.info(f"Building FAISS index: {embeddings.shape[0]} vectors, {dimension}D")
+        count, dimension = embeddings.shape
+        logger.info(f"Building FAISS index ({index_type}): {count} vectors, {dimension}D")
 
-        index = faiss.IndexFlatIP(dimension)
-        faiss.normalize_L2(embeddings)
-        index.add(embeddings)
+        # float32 memmaps pass through without a copy; float16 stores are widened chunk by chunk
+        if embeddings.dtype == np.float32 and embeddings.flags.writeable:
+            faiss.normalize_L2(embeddings)
+
+        index = create_faiss_index(dimension, index_type)
+        if not index.is_trained:
+            index.train(np.ascontiguousarray(embeddings[:INDEX_ADD_CHUNK], dtype=np.float32))
+        for start in range(0, count, INDEX_ADD_CHUNK):
+            index.add(np.ascontiguousarray(embeddings[start:start + INDEX_ADD_CHUNK], dtype=np.float32))
 
-        index_path = os.path.join(os.path.dirname(__file__), '..', 'data', 'embeddings', 'skill_index.faiss')
         os.makedirs(os.path.dirname(index_path), exist_ok=True)
-        faiss.write_index(index, index_path)
+        tmp_path = atomic_temp_path(index_path)
+        faiss.write_index(index, tmp_path)
+        os.replace(tmp_path, index_path)
 
         logger.info(f"[OK] FAISS index saved to {index_path}")
         return index
     except Exception as e:
         logger.error(f"Error building FAISS index: {str(e)}")
+        discard_temp(tmp_path)
+        return None
+
+@holds_index_lock
+def rebuild_index_from_store(index_type=INDEX_TYPE):
+    vectors = load_vector_store()
+    if vectors is None:
+        logger.error(f"No vector store at {VECTORS_PATH}, run update_embeddings_optimized first")
         return None
+    index = build_faiss_index(vectors, index_type=index_type)
+    if index is not None:
+        publish_index_version(index, index_type=index_type, vector_dtype=str(vectors.dtype))
+    return index
+
+def published_index_settings():
+    # Rebuilds must not silently switch a published sq8/float16 index back to the defaults
+    metadata = read_index_version()
+    return metadata.get("index_type", INDEX_TYPE), metadata.get("vector_dtype", VECTOR_STORE_DTYPE)
+
+def write_json_atomic(path, payload):
+    tmp_path = atomic_temp_path(path)
+    with open(tmp_path, 'w') as f:
+        json.dump(payload, f, indent=2)
+    os.replace(tmp_path, path)
+
+def read_index_version():
+    try:
+        with open(INDEX_VERSION_PATH) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+    except Exception as e:
+        logger.warning(f"Could not read index version: {str(e)}")
+        return {}
 
+def prompt_fingerprint():
+    prompts = json.dumps([DESCRIPTION_MODEL, BATCH_DESCRIPTION_PROMPT, SINGLE_DESCRIPTION_PROMPT])
+    return hashlib.sha256(prompts.encode()).hexdigest()[:16]
+
+def embedding_fingerprint(backend=None):
+    backend = backend or get_embedding_backend()
+    return {
+        "embedding_backend": backend.name,
+        "embedding_model": backend.model,
+        "embedding_model_digest": backend.digest(),
+        "description_model": DESCRIPTION_MODEL if backend.uses_descriptions else None,
+        "prompt_fingerprint": prompt_fingerprint() if backend.uses_descriptions else None
+    }
+
+def fingerprint_mismatch(stored, current):
+    # Returns the first field that makes stored vectors incompatible with current ones
+    # Indexes published before backends were pluggable were all built by Ollama
+    if stored.get("embedding_backend", 'ollama') != current.get("embedding_backend"):
+        return "embedding_backend"
+    for key in ("embedding_model", "description_model", "prompt_fingerprint"):
+        if stored.get(key) != current.get(key):
+            return key
+    stored_digest, current_digest = stored.get("embedding_model_digest"), current.get("embedding_model_digest")
+    if stored_digest and current_digest and stored_digest != current_digest:
+        return "embedding_model_digest"
+    return None
+
+def publish_index_version(index, index_type=INDEX_TYPE, vector_dtype=VECTOR_STORE_DTYPE, fingerprint=None, version=None):
+    metadata = {
+        "version": version or uuid.uuid4().hex[:12],
+        "created_at": time.time(),
+        "count": index.ntotal,
+        "dimension": index.d,
+        "index_type": index_type,
+        "vector_dtype": vector_dtype
+    }
+    # Rebuilds from stored vectors keep the fingerprint of the run that embedded them
+    if fingerprint is None:
+        fingerprint = read_index_version().get("fingerprint", {})
+    metadata["fingerprint"] = fingerprint
+    write_json_atomic(INDEX_VERSION_PATH, metadata)
+    logger.info(f"[OK] Published index version {metadata['version']}")
+    return metadata
+
+IndexSnapshot = namedtuple('IndexSnapshot', ['index', 'skills', 'vectors', 'metadata', 'positions'])
+
+class SkillIndex:
+    def __init__(self, poll_seconds=INDEX_POLL_SECONDS):
+        self.poll_seconds = poll_seconds
+        self.snapshot = None
+        # Outlives snapshots and only grows, so skills added between rebuilds stay searchable
+        self.lexical = LexicalIndex()
+        # Highest skills.id already merged into the lexical index
+        self._lexical_max_id = 0
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def load(self):
+        try:
+            metadata = read_index_version()
+            index = faiss.read_index(INDEX_PATH, INDEX_READ_FLAGS)
+            with open(SKILLS_PATH) as f:
+                skills = json.load(f)
+            vectors = load_vector_store()
+
+            if index.ntotal != len(skills):
+                logger.error(f"Index has {index.ntotal} vectors but skill list has {len(skills)} entries")
+                return False
+            # Stored vectors are sliced by skill position, so a mismatched store is not used
+            if vectors is not None and (vectors.ndim != 2 or vectors.shape != (len(skills), index.d)):
+                logger.warning(f"Vector store shape {vectors.shape} does not match {len(skills)}x{index.d} index, "
+                               "serving without stored vectors")
+                vectors = None
+            if read_index_version() != metadata:
+                logger.warning("Index was republished while loading, will retry")
+                return False
+
+            # A single assignment, so concurrent requests see either the old or the new snapshot
+            positions = {skill.lower(): position for position, skill in enumerate(skills)}
+            self.lexical.add_all(skills)
+            self.snapshot = IndexSnapshot(index, skills, vectors, metadata, positions)
+            logger.info(f"[OK] Loaded skill index version {metadata.get('version', 'unversioned')} ({len(skills)} skills)")
+            return True
+        except Exception as e:
+            logger.error(f"Error loading skill index: {str(e)}")
+            return False
+
+    def get(self):
+        self.maybe_reload()
+        return self.snapshot
+
+    def maybe_reload(self):
+        now = time.monotonic()
+        if now - self._checked_at < self.poll_seconds:
+            return
+        # Only one thread checks; the rest keep serving the current snapshot
+        if not self._lock.acquire(blocking=False):
+            return
+        try:
+            self._checked_at = now
+            self.refresh_lexical()
+            if self.snapshot is None:
+                if os.path.exists(INDEX_PATH):
+                    self.load()
+                return
+            version = read_index_version().get('version')
+            if version and version != self.snapshot.metadata.get('version'):
+                logger.info(f"New index version {version} published, reloading")
+                self.load()
+        finally:
+            self._lock.release()
+
+    def refresh_lexical(self):
+        # Skills written through other workers or processes reach autocomplete on the
+        # next poll instead of waiting for the embedding rebuild to publish
+        if not has_app_context():
+            return
+        try:
+            latest = db.session.query(db.func.max(Skill.id)).scalar() or 0
+            if latest <= self._lexical_max_id:
+                return
+            if self._lexical_max_id == 0:
+                names = gather_unique_skills()
+            else:
+                rows = db.session.query(Skill.skill_offered) \
+                    .filter(Skill.id > self._lexical_max_id, Skill.id <= latest) \
+                    .order_by(Skill.id)
+                names = [skill_offered for (skill_offered,) in rows]
+            self.lexical.add_all(names)
+            self._lexical_max_id = latest
+        except Exception as e:
+            logger.warning(f"Lexical refresh from the database failed: {str(e)}")
+
+SKILL_GATHER_CHUNK = 10000
+
+def gather_unique_skills():
+    # Deduplicated in SQL over the indexed skill_offered_norm column and streamed in
+    # chunks; each skill keeps the spelling of its first row, in first-seen order
+    first_ids = db.session.query(db.func.min(Skill.id).label('id')) \
+        .filter(Skill.skill_offered_norm.isnot(None)) \
+        .group_by(Skill.skill_offered_norm) \
+        .subquery()
+    rows = db.session.query(Skill.skill_offered) \
+        .join(first_ids, Skill.id == first_ids.c.id) \
+        .order_by(Skill.id) \
+        .yield_per(SKILL_GATHER_CHUNK)
+    unique_skills = [skill_offered.strip() for (skill_offered,) in rows]
+
+    logger.info(f"Unique: {len(unique_skills)} skills")
+    return unique_skills
+
+@holds_index_lock
 def update_embeddings_optimized():
     try:
         with app.app_context():
-            all_skills = [skill.skill_offered for skill in Skill.query.all()]
-            if not all_skills:
+            # Run standalone, nothing else has migrated the database yet
+            ensure_schema()
+            unique_skills = gather_unique_skills()
+            if not unique_skills:
                 logger.warning("No skills found in database")
                 return None, []
 
-            unique_skills = []
-            seen = set()
-            for skill in all_skills:
-                skill_clean = skill.strip()
-                if skill_clean and skill_clean.lower() not in seen:
-                    seen.add(skill_clean.lower())
-                    unique_skills.append(skill_clean)
-
-            logger.info(f"Total: {len(all_skills)} skills, Unique: {len(unique_skills)} skills")
-            logger.info(f"Processing skills: {unique_skills}")
+            logger.info(f"Processing {len(unique_skills)} skills")
 
             total_start = time.time()
             embeddings, processed_skills = generate_embeddings_optimized(unique_skills)
@@ -260,14 +882,21 @@ def update_embeddings_optimized():
                 logger.error("Failed to generate embeddings")
                 return None, []
 
-            index = build_faiss_index(embeddings)
+            faiss.normalize_L2(embeddings)
+            index_type, vector_dtype = published_index_settings()
+            if not save_vector_store(embeddings, dtype=vector_dtype):
+                logger.error("Failed to save vector store")
+                return None, []
+
+            index = build_faiss_index(load_vector_store(), index_type=index_type)
             if index is None:
                 logger.error("Failed to build FAISS index")
                 return None, []
 
-            skills_path = os.path.join(os.path.dirname(__file__), '..', 'data', 'embeddings', 'skills.json')
-            with open(skills_path, 'w') as f:
-                json.dump(processed_skills, f, indent=2)
+            skills_path = SKILLS_PATH
+            write_json_atomic(skills_path, processed_skills)
+            publish_index_version(index, index_type=index_type, vector_dtype=vector_dtype,
+                                  fingerprint=embedding_fingerprint())
 
             total_time = time.time() - total_start
             logger.info(f"[OK] Complete pipeline finished in {total_time:.2f} seconds")
@@ -278,40 +907,188 @@ def update_embeddings_optimized():
         logger.error(f"Error in optimized update: {str(e)}")
         return None, []
 
-def query_similar_skills(skill_query, index, skill_list, top_k=5):
+@holds_index_lock
+def update_embeddings_incremental():
+    # Embeds only the skills missing from the published catalog, so repeated or
+    # concurrent triggers converge on the database contents
     try:
-        logger.info(f"Querying: {skill_query}")
+        with app.app_context():
+            ensure_schema()
+            unique_skills = gather_unique_skills()
 
-        description = generate_single_description(skill_query)
-        query_embedding, _ = generate_embeddings_optimized([description])
+        vectors = load_vector_store()
+        try:
+            with open(SKILLS_PATH) as f:
+                existing_skills = json.load(f)
+        except (FileNotFoundError, ValueError):
+            existing_skills = None
 
-        if query_embedding.size == 0:
-            logger.error("Failed to generate query embedding")
-            return None, None, None
+        if vectors is None or existing_skills is None or len(vectors) != len(existing_skills):
+            logger.info("No usable vector store, falling back to a full rebuild")
+            return update_embeddings_optimized()
+
+        stored_fingerprint = read_index_version().get("fingerprint", {})
+        mismatch = fingerprint_mismatch(stored_fingerprint, embedding_fingerprint())
+        if mismatch:
+            logger.info(f"Stored vectors were built with a different {mismatch}, falling back to a full rebuild")
+            return update_embeddings_optimized()
+
+        known = {skill.lower() for skill in existing_skills}
+        new_skills = [skill for skill in unique_skills if skill.lower() not in known]
+        if not new_skills:
+            logger.info("Skill index already up to date")
+            return None, existing_skills
+
+        logger.info(f"Incremental update: embedding {len(new_skills)} new skills")
+        embeddings, processed_skills = generate_embeddings_optimized(new_skills)
+        if embeddings.size == 0:
+            logger.error("Failed to generate embeddings for new skills")
+            return None, []
+        if embeddings.shape[1] != vectors.shape[1]:
+            logger.warning(f"Embedding dimension changed ({vectors.shape[1]} -> {embeddings.shape[1]}), rebuilding")
+            return update_embeddings_optimized()
+
+        if fingerprint_mismatch(stored_fingerprint, embedding_fingerprint()):
+            logger.info("Embedding model changed since the last build, falling back to a full rebuild")
+            return update_embeddings_optimized()
+
+        faiss.normalize_L2(embeddings)
+        combined = np.concatenate([vectors, embeddings.astype(vectors.dtype)])
+        vector_dtype = str(vectors.dtype)
+        del vectors
+        if not save_vector_store(combined, dtype=vector_dtype):
+            logger.error("Failed to save vector store")
+            return None, []
+
+        index_type, _ = published_index_settings()
+        index = build_faiss_index(load_vector_store(), index_type=index_type)
+        if index is None:
+            logger.error("Failed to build FAISS index")
+            return None, []
+
+        skills = existing_skills + processed_skills
+        write_json_atomic(SKILLS_PATH, skills)
+        publish_index_version(index, index_type=index_type, vector_dtype=vector_dtype,
+                              fingerprint=embedding_fingerprint())
+        return index, skills
+    except Exception as e:
+        logger.error(f"Error in incremental update: {str(e)}")
+        return None, []
+
+INDEX_UPDATE_DEBOUNCE_SECONDS = 2
+
+class IndexUpdateQueue:
+    def __init__(self, debounce_seconds=INDEX_UPDATE_DEBOUNCE_SECONDS):
+        self.debounce_seconds = debounce_seconds
+        self._requested = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def submit(self):
+        self._requested.set()
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='index-updater', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            self._requested.wait()
+            # Let a burst of submissions collapse into a single update
+            time.sleep(self.debounce_seconds)
+            self._requested.clear()
+            update_embeddings_incremental()
+
+index_updates = IndexUpdateQueue()
 
-        faiss.normalize_L2(query_embedding)
-        distances, indices = index.search(query_embedding, min(top_k, index.ntotal))
+def embed_query(skill_query, backend=None):
+    backend = backend or get_embedding_backend()
+    text = generate_single_description(skill_query) if backend.uses_descriptions else skill_query
+    query_embedding = backend.embed([text])
 
-        results = []
-        for i, (distance, idx) in enumerate(zip(distances[0], indices[0])):
-            if idx < len(skill_list):
-                results.append({
-                    'skill': skill_list[idx],
-                    'similarity': float(distance),
-                    'rank': i + 1
-                })
+    if query_embedding is None or query_embedding.size == 0:
+        logger.error("Failed to generate query embedding")
+        return None
+
+    faiss.normalize_L2(query_embedding)
+    return query_embedding
+
+def query_similar_skills(skill_query, index, skill_list, top_k=5, backend=None):
+    try:
+        logger.info(f"Querying: {skill_query}")
 
-        return distances, indices, results
+        query_embedding = embed_query(skill_query, backend)
+        if query_embedding is None:
+            return None, None, None
+
+        return search_similar_by_vector(query_embedding, index, skill_list, top_k)
     except Exception as e:
         logger.error(f"Error in query: {str(e)}")
         return None, None, None
 
+def search_similar_by_vector(query_embedding, index, skill_list, top_k=5):
+    # query_embedding: (1, d) L2-normalized float32
+    distances, indices = index.search(query_embedding, min(top_k, index.ntotal))
+
+    results = []
+    for i, (distance, idx) in enumerate(zip(distances[0], indices[0])):
+        if 0 <= idx < len(skill_list):
+            results.append({
+                'skill': skill_list[idx],
+                'similarity': float(distance),
+                'rank': i + 1
+            })
+
+    return distances, indices, results
+
+# Filtered search planning. The exact plan gathers and scores allowed_count x d
+# stored floats; the id-selector search pays a pass over every indexed row plus
+# its own per-id cost. scripts/bench_filtered_search.py puts one row of that pass
+# at about 20 floats of exact scoring (50k-500k rows, 256-1024 dims, 1 thread).
+EXACT_SCAN_FLOATS_PER_ROW = 20
+
+def plan_filtered_search(allowed_count, total_count, dimension, vectors_available=True):
+    if not vectors_available:
+        return 'filtered_ann'
+    if allowed_count * dimension <= EXACT_SCAN_FLOATS_PER_ROW * total_count:
+        return 'exact'
+    return 'filtered_ann'
+
+def search_similar_filtered(query_embedding, index, vectors, skill_list, allowed_positions, top_k=5, plan=None):
+    # allowed_positions: FAISS row ids the results are restricted to; plan overrides the planner
+    allowed = np.unique(np.asarray(allowed_positions, dtype=np.int64))
+    if allowed.size == 0:
+        return [], 'empty'
+
+    plan = plan or plan_filtered_search(allowed.size, index.ntotal, index.d, vectors is not None)
+    k = min(top_k, allowed.size)
+    if plan == 'exact':
+        scores = np.asarray(vectors[allowed], dtype=np.float32) @ query_embedding[0]
+        best = np.argpartition(-scores, k - 1)[:k]
+        best = best[np.argsort(-scores[best])]
+        hits = zip(scores[best], allowed[best])
+    else:
+        params = faiss.SearchParameters(sel=faiss.IDSelectorBatch(allowed))
+        distances, indices = index.search(query_embedding, k, params=params)
+        hits = zip(distances[0], indices[0])
+
+    results = []
+    for distance, idx in hits:
+        if 0 <= idx < len(skill_list):
+            results.append({
+                'skill': skill_list[idx],
+                'position': int(idx),
+                'similarity': float(distance),
+                'rank': len(results) + 1
+            })
+    return results, plan
+
 if __name__ == '__main__':
     logger.info("=== Optimized Embeddings Test ===")
 
     try:
-        if not check_ollama_availability():
-            logger.error("Ollama not available")
+        if not get_embedding_backend().available():
+            logger.error(f"{EMBEDDING_BACKEND} embedding backend not available")
             exit(1)
 
         with app.app_context():
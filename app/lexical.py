@@ -0,0 +1,136 @@
+import heapq
+import threading
+from collections import Counter, defaultdict, deque
+from itertools import chain
+
+# A lookup scoring at least this high is trusted without a semantic round trip
+LEXICAL_STRONG_SCORE = 0.85
+FUZZY_CANDIDATES = 20
+FUZZY_MIN_SCORE = 0.5
+
+# Marks a complete key in the trie; not a string, so no skill name can collide with it
+_END = None
+
+
+def normalize(text):
+    return " ".join(text.lower().split())
+
+
+def trigrams(key):
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def edit_distance(a, b):
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+        previous = current
+    return previous[-1]
+
+
+class LexicalIndex:
+    # Prefix trie plus trigram postings over the skill catalog; ids are
+    # insertion order and are independent of FAISS row numbers.
+    def __init__(self, skills=()):
+        self.names = []
+        self.keys = []
+        self._ids = {}
+        self._trie = {}
+        self._postings = defaultdict(list)
+        self._gram_counts = []
+        self._lock = threading.Lock()
+        self.add_all(skills)
+
+    def __len__(self):
+        return len(self.names)
+
+    def add(self, name):
+        key = normalize(name)
+        if not key:
+            return None
+        with self._lock:
+            if key in self._ids:
+                return self._ids[key]
+            skill_id = len(self.names)
+            node = self._trie
+            for char in key:
+                node = node.setdefault(char, {})
+            grams = trigrams(key)
+
+            # The entry is recorded only once the walk has succeeded, keeping the lists aligned
+            node[_END] = skill_id
+            self.names.append(name.strip())
+            self.keys.append(key)
+            self._ids[key] = skill_id
+            for gram in grams:
+                self._postings[gram].append(skill_id)
+            self._gram_counts.append(len(grams))
+            return skill_id
+
+    def add_all(self, names):
+        for name in names:
+            self.add(name)
+
+    def _prefix_ids(self, key, limit):
+        node = self._trie
+        for char in key:
+            node = node.get(char)
+            if node is None:
+                return []
+        # Breadth-first, so shorter completions come first
+        found = []
+        queue = deque([node])
+        while queue and len(found) < limit:
+            node = queue.popleft()
+            for char, child in node.items():
+                if char is _END:
+                    found.append(child)
+                else:
+                    queue.append(child)
+        return found[:limit]
+
+    def _fuzzy_ids(self, key):
+        grams = trigrams(key)
+        shared = Counter(chain.from_iterable(self._postings.get(gram, ()) for gram in grams))
+        # Dice coefficient over trigrams picks candidates; edit distance ranks them
+        candidates = heapq.nlargest(
+            FUZZY_CANDIDATES,
+            shared,
+            key=lambda skill_id: shared[skill_id] / (len(grams) + self._gram_counts[skill_id])
+        )
+        scored = []
+        for skill_id in candidates:
+            candidate = self.keys[skill_id]
+            score = 1 - edit_distance(key, candidate) / max(len(key), len(candidate))
+            if score >= FUZZY_MIN_SCORE:
+                scored.append((skill_id, score))
+        return scored
+
+    def lookup(self, query, limit=10):
+        key = normalize(query)
+        if not key:
+            return []
+
+        with self._lock:
+            scores = {}
+            exact = self._ids.get(key)
+            if exact is not None:
+                scores[exact] = (1.0, 'exact')
+            for skill_id in self._prefix_ids(key, limit):
+                if skill_id not in scores:
+                    scores[skill_id] = (len(key) / len(self.keys[skill_id]), 'prefix')
+            # Typo tolerance is only needed when the prefix walk came up short
+            if len(scores) < limit:
+                for skill_id, score in self._fuzzy_ids(key):
+                    # A tie keeps the prefix label: the query really is a prefix of the skill
+                    if skill_id not in scores or scores[skill_id][0] < score - 1e-9:
+                        scores[skill_id] = (score, 'fuzzy')
+
+            ranked = sorted(scores.items(), key=lambda item: (-item[1][0], len(self.keys[item[0]])))[:limit]
+            return [
+                {"skill": self.names[skill_id], "score": round(score, 4), "match": match}
+                for skill_id, (score, match) in ranked
+            ]
@@ -1,6 +1,9 @@
 import logging
 import os
+import re
+import time
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from flask import Flask
 
 # Set up logging for debugging
@@ -11,12 +14,32 @@ logger = logging.getLogger(__name__)
 db = SQLAlchemy()
 
 
+# "New Delhi, India " -> "new delhi"; the first comma-separated part is the city
+def normalize_location(location):
+    if not location:
+        return None
+    city = location.split(',', 1)[0]
+    city = re.sub(r'[^\w\s]', ' ', city.lower())
+    return " ".join(city.split()) or None
+
+
+# " PyTorch " -> "pytorch"; the key skills are deduplicated and matched by
+def normalize_skill(skill):
+    return (skill or '').strip().lower() or None
+
+
 # User Model
 class User(db.Model):
     __tablename__ = 'users'
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(50), nullable=False)
     location = db.Column(db.String(100), nullable=True)
+    location_norm = db.Column(db.String(100), nullable=True, index=True)
+
+    @db.validates('location')
+    def _set_location_norm(self, key, location):
+        self.location_norm = normalize_location(location)
+        return location
 
     def __repr__(self):
         return f"<User(id={self.id}, name={self.name}, location={self.location})>"
@@ -26,10 +49,16 @@ class User(db.Model):
 class Skill(db.Model):
     __tablename__ = 'skills'
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
     skill_offered = db.Column(db.String(50), nullable=False)
+    skill_offered_norm = db.Column(db.String(50), nullable=True, index=True)
     skill_wanted = db.Column(db.String(50), nullable=True)
 
+    @db.validates('skill_offered')
+    def _set_skill_offered_norm(self, key, skill_offered):
+        self.skill_offered_norm = normalize_skill(skill_offered)
+        return skill_offered
+
     def __repr__(self):
         return f"<Skill(id={self.id}, user_id={self.user_id}, skill_offered={self.skill_offered}, skill_wanted={self.skill_wanted})>"
 
@@ -58,6 +87,57 @@ class Feedback(db.Model):
         return f"<Feedback(id={self.id}, swap_id={self.swap_id}, rating={self.rating}, comment={self.comment})>"
 
 
+# UserReputation Model (aggregates maintained by the feedback write path)
+class UserReputation(db.Model):
+    __tablename__ = 'user_reputation'
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    rating_count = db.Column(db.Integer, nullable=False, default=0)
+    rating_sum = db.Column(db.Integer, nullable=False, default=0)
+    rating_1 = db.Column(db.Integer, nullable=False, default=0)
+    rating_2 = db.Column(db.Integer, nullable=False, default=0)
+    rating_3 = db.Column(db.Integer, nullable=False, default=0)
+    rating_4 = db.Column(db.Integer, nullable=False, default=0)
+    rating_5 = db.Column(db.Integer, nullable=False, default=0)
+
+    @property
+    def average(self):
+        return self.rating_sum / self.rating_count if self.rating_count else None
+
+    @property
+    def histogram(self):
+        return {str(r): getattr(self, f'rating_{r}') for r in range(1, 6)}
+
+    @classmethod
+    def record(cls, user_id, rating):
+        # Increment in SQL so concurrent writers never lose an update; the caller commits.
+        # INSERT OR IGNORE creates the row without racing another first rating.
+        db.session.execute(sqlite_insert(cls).values(user_id=user_id).on_conflict_do_nothing())
+        bucket = f'rating_{rating}'
+        db.session.execute(cls.__table__.update().where(cls.user_id == user_id).values({
+            'rating_count': cls.rating_count + 1,
+            'rating_sum': cls.rating_sum + rating,
+            bucket: getattr(cls, bucket) + 1
+        }))
+
+    def __repr__(self):
+        return f"<UserReputation(user_id={self.user_id}, rating_count={self.rating_count}, rating_sum={self.rating_sum})>"
+
+
+# Resume Model (one row per processed upload, deduplicated by content hash)
+class Resume(db.Model):
+    __tablename__ = 'resumes'
+    __table_args__ = (db.UniqueConstraint('user_id', 'content_hash', name='uq_resume_user_hash'),)
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    content_hash = db.Column(db.String(64), nullable=False, index=True)
+    filename = db.Column(db.String(200), nullable=True)
+    skills = db.Column(db.Text, nullable=False, default='[]')  # JSON list of extracted skills
+    text = db.Column(db.Text, nullable=True)  # extracted text, re-matched when another user uploads the same file
+
+    def __repr__(self):
+        return f"<Resume(id={self.id}, user_id={self.user_id}, content_hash={self.content_hash[:12]}, filename={self.filename})>"
+
+
 # Debug function to initialize and verify database
 def init_db(app=None):
     if app is None:
@@ -94,7 +174,7 @@ def init_db(app=None):
 
     try:
         with app.app_context():
-            db.create_all()
+            ensure_schema()
             logger.debug("Database tables created successfully")
             # Verify table creation
             if User.query.first() is None:
@@ -106,6 +186,98 @@ def init_db(app=None):
         raise
 
 
+SCHEMA_BACKFILL_CHUNK = 10000
+REPUTATION_STAMP_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'data', 'reputation_rebuilt'))
+
+
+# Create missing tables, then add columns introduced after a database was first
+# created (create_all only adds tables). Safe to call from any entry point.
+def ensure_schema():
+    reputation_existed = db.inspect(db.engine).has_table('user_reputation')
+    db.create_all()
+    inspector = db.inspect(db.engine)
+    user_columns = {column['name'] for column in inspector.get_columns('users')}
+    if 'location_norm' not in user_columns:
+        with db.engine.begin() as conn:
+            conn.execute(db.text('ALTER TABLE users ADD COLUMN location_norm VARCHAR(100)'))
+            conn.execute(db.text('CREATE INDEX IF NOT EXISTS ix_users_location_norm ON users (location_norm)'))
+            rows = conn.execute(db.text('SELECT id, location FROM users')).fetchall()
+            if rows:
+                conn.execute(
+                    db.text('UPDATE users SET location_norm = :norm WHERE id = :id'),
+                    [{"id": user_id, "norm": normalize_location(location)} for user_id, location in rows]
+                )
+        logger.info("Added and backfilled users.location_norm")
+    skill_columns = {column['name'] for column in inspector.get_columns('skills')}
+    if 'skill_offered_norm' not in skill_columns:
+        with db.engine.begin() as conn:
+            conn.execute(db.text('ALTER TABLE skills ADD COLUMN skill_offered_norm VARCHAR(50)'))
+            # Keyset pages keep the backfill's memory flat on large tables
+            last_id = 0
+            while True:
+                rows = conn.execute(
+                    db.text('SELECT id, skill_offered FROM skills WHERE id > :last ORDER BY id LIMIT :limit'),
+                    {"last": last_id, "limit": SCHEMA_BACKFILL_CHUNK}
+                ).fetchall()
+                if not rows:
+                    break
+                conn.execute(
+                    db.text('UPDATE skills SET skill_offered_norm = :norm WHERE id = :id'),
+                    [{"id": skill_id, "norm": normalize_skill(skill_offered)} for skill_id, skill_offered in rows]
+                )
+                last_id = rows[-1][0]
+            conn.execute(db.text('CREATE INDEX IF NOT EXISTS ix_skills_skill_offered_norm ON skills (skill_offered_norm)'))
+        logger.info("Added and backfilled skills.skill_offered_norm")
+    resume_columns = {column['name'] for column in inspector.get_columns('resumes')}
+    if 'text' not in resume_columns:
+        # Older rows stay NULL and are simply parsed again if their file is re-uploaded
+        with db.engine.begin() as conn:
+            conn.execute(db.text('ALTER TABLE resumes ADD COLUMN text TEXT'))
+        logger.info("Added resumes.text")
+    # Lets location-filtered lookups reach a user's skills without scanning the table
+    with db.engine.begin() as conn:
+        conn.execute(db.text('CREATE INDEX IF NOT EXISTS ix_skills_user_id ON skills (user_id)'))
+    if not reputation_existed:
+        # A new table starts empty; fill it from any feedback already recorded
+        rebuild_reputation()
+
+
+# Recompute every UserReputation row from the feedback table in one aggregate query
+def rebuild_reputation():
+    rated_user = Swap.to_user_id
+    valid = Feedback.rating.between(1, 5)
+    buckets = [db.func.sum(db.case((Feedback.rating == r, 1), else_=0)) for r in range(1, 6)]
+    rows = db.session.query(rated_user, db.func.count(Feedback.id), db.func.sum(Feedback.rating), *buckets) \
+        .join(Swap, Feedback.swap_id == Swap.id) \
+        .filter(valid) \
+        .group_by(rated_user) \
+        .all()
+
+    UserReputation.query.delete()
+    if rows:
+        db.session.execute(UserReputation.__table__.insert(), [
+            {
+                "user_id": user_id, "rating_count": count, "rating_sum": total,
+                "rating_1": r1, "rating_2": r2, "rating_3": r3, "rating_4": r4, "rating_5": r5
+            }
+            for user_id, count, total, r1, r2, r3, r4, r5 in rows
+        ])
+    db.session.commit()
+    # Servers fold the stamp into reputation ETags, so a rebuild from another process
+    # is not hidden behind responses cached against the old rows
+    with open(REPUTATION_STAMP_PATH, 'w') as f:
+        f.write(str(time.time_ns()))
+    logger.info(f"Rebuilt reputation for {len(rows)} users")
+    return len(rows)
+
+
+def reputation_stamp():
+    try:
+        return os.stat(REPUTATION_STAMP_PATH).st_mtime_ns
+    except FileNotFoundError:
+        return 0
+
+
 if __name__ == '__main__':
     # Test the models and database creation independently
     init_db()
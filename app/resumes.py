@@ -0,0 +1,96 @@
+import hashlib
+import io
+import json
+import logging
+import re
+from functools import lru_cache
+import pdfplumber
+from app.models import db, Skill, Resume, normalize_skill
+
+logger = logging.getLogger(__name__)
+
+# Skills recognised even before they appear in the embedded skill catalog
+COMMON_SKILLS = [
+    "Python", "Java", "JavaScript", "SQL", "HTML", "CSS", "Flask", "Streamlit",
+    "Machine Learning", "Deep Learning", "Data Science", "NLP", "Computer Vision"
+]
+
+# Names this short ("R", "Go", "C") only match with their exact casing
+CASE_SENSITIVE_MAX_LENGTH = 2
+
+
+def _alternation(names):
+    # Longest first so "Machine Learning" wins over a shorter overlapping name
+    escaped = sorted((re.escape(name) for name in names), key=len, reverse=True)
+    return r'(?<![\w+#.])(' + '|'.join(escaped) + r')(?![\w+#])'
+
+
+@lru_cache(maxsize=4)
+def skill_patterns(vocabulary):
+    canonical = {}
+    for name in vocabulary:
+        name = name.strip()
+        if name:
+            canonical.setdefault(name.lower(), name)
+
+    short_names = [name for name in canonical.values() if len(name) <= CASE_SENSITIVE_MAX_LENGTH]
+    long_names = [name for name in canonical.values() if len(name) > CASE_SENSITIVE_MAX_LENGTH]
+    patterns = []
+    if long_names:
+        patterns.append(re.compile(_alternation(long_names), re.IGNORECASE))
+    if short_names:
+        patterns.append(re.compile(_alternation(short_names)))
+    return patterns, canonical
+
+
+def extract_skills_from_text(text, vocabulary=()):
+    patterns, canonical = skill_patterns(tuple(COMMON_SKILLS) + tuple(vocabulary))
+    found = {}
+    for pattern in patterns:
+        for match in pattern.finditer(text):
+            key = match.group(1).lower()
+            found.setdefault(key, canonical[key])
+    return list(found.values())
+
+
+def extract_text_from_pdf(content):
+    # Parse straight from memory; no temp file round trip
+    with pdfplumber.open(io.BytesIO(content)) as pdf:
+        return " ".join(page.extract_text() or "" for page in pdf.pages)
+
+
+def ingest_resume(user_id, content, filename=None, vocabulary=()):
+    # Returns (resume, skills, added_skills, duplicate); the caller commits.
+    content_hash = hashlib.sha256(content).hexdigest()
+    existing = Resume.query.filter_by(user_id=user_id, content_hash=content_hash).first()
+    if existing:
+        return existing, json.loads(existing.skills), [], True
+
+    # Identical content uploaded by another user skips the PDF parse, but is matched
+    # again: the stored skill list reflects whatever vocabulary it was parsed with
+    known = db.session.query(Resume.text) \
+        .filter(Resume.content_hash == content_hash, Resume.text.isnot(None)) \
+        .first()
+    if known:
+        text = known.text
+    else:
+        try:
+            text = extract_text_from_pdf(content)
+        except Exception as e:
+            logger.error(f"Error extracting text from resume: {str(e)}")
+            raise ValueError("Could not parse resume")
+    skills = extract_skills_from_text(text, vocabulary)
+    logger.debug(f"Extracted skills from resume: {skills}")
+
+    current = {norm for (norm,) in db.session.query(Skill.skill_offered_norm).filter_by(user_id=user_id)}
+    added_skills = [skill for skill in skills if normalize_skill(skill) not in current]
+
+    resume = Resume(user_id=user_id, content_hash=content_hash, filename=filename, skills=json.dumps(skills), text=text)
+    db.session.add(resume)
+    if added_skills:
+        db.session.execute(Skill.__table__.insert(), [
+            # Core inserts skip the model validator, so the normalized key is set here
+            {"user_id": user_id, "skill_offered": skill, "skill_offered_norm": normalize_skill(skill)}
+            for skill in added_skills
+        ])
+    return resume, skills, added_skills, False
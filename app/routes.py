@@ -1,9 +1,22 @@
 import logging
+import multiprocessing
 import os
+import threading
+import time
+import uuid
+import zlib
+from collections import OrderedDict, defaultdict
+import numpy as np
+import click
 from flask import Flask, request, jsonify
 from flask_cors import CORS
-from app.models import db, User, Skill, Swap, Feedback
-from app.embeddings import update_embeddings_optimized
+from app.models import db, User, Skill, Swap, Feedback, UserReputation, rebuild_reputation, reputation_stamp, ensure_schema, normalize_location
+from app.embeddings import (
+    embed_query, search_similar_by_vector, search_similar_filtered, SkillIndex, index_updates,
+    index_backend, rebuild_index_from_store, published_index_settings
+)
+from app.lexical import LEXICAL_STRONG_SCORE
+from app.resumes import ingest_resume
 
 # Configure logging
 log_file = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'app.log'))
@@ -20,21 +33,116 @@ CORS(app)
 base_dir = os.path.dirname(os.path.abspath(__file__))
 app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{os.path.join(base_dir, "..", "data", "skill_swap.db")}'
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+app.config['MAX_CONTENT_LENGTH'] = 10 * 1024 * 1024
 db.init_app(app)
 
 with app.app_context():
-    db.create_all()
+    ensure_schema()
     logger.debug("Database initialized in routes.py")
 
+# Response cache for read endpoints. Writes bump version counters, and the
+# ETag of a cached response is derived from the versions it depends on, so
+# revalidation never has to touch the database.
+RESPONSE_CACHE_MAX_ENTRIES = 1024
+CACHE_VERSION_SLOTS = 4096
+_cache_lock = threading.Lock()
+_response_cache = OrderedDict()
+# Version counters live in shared memory allocated at import, so under a
+# preloading prefork server a write in one worker invalidates every worker.
+# Keys hash into slots; a collision only costs an extra cache miss.
+_cache_versions = multiprocessing.RawArray('q', CACHE_VERSION_SLOTS)
+_cache_versions_lock = multiprocessing.Lock()
+# Distinguishes ETags across restarts, when the counters start over
+_cache_epoch = uuid.uuid4().hex[:8]
+
+
+def _version_slot(key):
+    return zlib.crc32(key.encode()) % CACHE_VERSION_SLOTS
+
+
+def bump_versions(*keys):
+    with _cache_versions_lock:
+        for key in keys:
+            _cache_versions[_version_slot(key)] += 1
+
+
+def current_etag(version_keys, stamp=None):
+    with _cache_versions_lock:
+        versions = "-".join(str(_cache_versions[_version_slot(key)]) for key in version_keys)
+    etag = f"{_cache_epoch}-{versions}"
+    return f"{etag}-{stamp}" if stamp is not None else etag
+
+
+# `stamp` covers changes made outside the server processes, which cannot bump the counters
+def cached_json(cache_key, version_keys, build, stamp=None):
+    etag = current_etag(version_keys, stamp)
+    if request.if_none_match.contains(etag):
+        response = app.response_class(status=304)
+    else:
+        with _cache_lock:
+            cached = _response_cache.get(cache_key)
+            if cached is not None:
+                _response_cache.move_to_end(cache_key)
+        if cached is not None and cached[0] == etag:
+            body = cached[1]
+        else:
+            body = jsonify(build()).get_data()
+            with _cache_lock:
+                _response_cache[cache_key] = (etag, body)
+                _response_cache.move_to_end(cache_key)
+                while len(_response_cache) > RESPONSE_CACHE_MAX_ENTRIES:
+                    _response_cache.popitem(last=False)
+        response = app.response_class(body, status=200, mimetype='application/json')
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+# Shared FAISS index; production workers get it pre-loaded via warm_up() in wsgi.py
+skill_index = SkillIndex()
+
+
+def warm_up():
+    if not skill_index.load():
+        logger.warning("Skill index not loaded at startup, /readyz will report not ready")
+
+# ✅ Liveness probe
+@app.route('/healthz', methods=['GET'])
+def healthz():
+    return jsonify({"status": "ok", "pid": os.getpid()}), 200
+
+# ✅ Readiness probe
+@app.route('/readyz', methods=['GET'])
+def readyz():
+    try:
+        db.session.execute(db.text('SELECT 1'))
+    except Exception as e:
+        logger.error(f"Readiness database check failed: {str(e)}")
+        return jsonify({"status": "unavailable", "error": "database unreachable"}), 503
+
+    snapshot = skill_index.get()
+    if snapshot is None:
+        return jsonify({"status": "loading", "error": "skill index not loaded"}), 503
+    return jsonify({
+        "status": "ready",
+        "index_version": snapshot.metadata.get('version'),
+        "embedding_backend": index_backend(snapshot.metadata).name,
+        "skills": len(snapshot.skills)
+    }), 200
+
 # ✅ List all users
 @app.route('/register', methods=['GET'])
 def list_users():
     try:
-        users = User.query.all()
-        return jsonify([
-            {"id": u.id, "name": u.name, "location": u.location}
-            for u in users
-        ]), 200
+        # Reputation comes from the same query so clients can rank suggestions without extra calls
+        return cached_json(('users',), ['users'], lambda: [
+            {
+                "id": u.id, "name": u.name, "location": u.location,
+                "rating_count": rep.rating_count if rep else 0,
+                "rating_average": rep.average if rep else None
+            }
+            for u, rep in db.session.query(User, UserReputation)
+            .outerjoin(UserReputation, UserReputation.user_id == User.id).all()
+        ], stamp=reputation_stamp())
     except Exception as e:
         logger.error(f"Error listing users: {str(e)}")
         return jsonify({"error": str(e)}), 500
@@ -56,6 +164,7 @@ def register():
         user = User(name=name, location=location)
         db.session.add(user)
         db.session.commit()
+        bump_versions('users')
         logger.info(f"Registered user: {user}")
         return jsonify({"id": user.id, "name": user.name, "location": user.location}), 201
     except Exception as e:
@@ -82,8 +191,10 @@ def add_skills():
         skill = Skill(user_id=user_id, skill_offered=skill_offered, skill_wanted=skill_wanted)
         db.session.add(skill)
         db.session.commit()
+        skill_index.lexical.add(skill_offered)
 
-        update_embeddings_optimized()
+        # Embedding runs in the background updater; workers reload once it publishes
+        index_updates.submit()
         logger.info(f"Added skill for user {user_id}: {skill_offered}")
         return jsonify({"message": "Skill added", "skill_id": skill.id}), 201
     except Exception as e:
@@ -91,6 +202,184 @@ def add_skills():
         db.session.rollback()
         return jsonify({"error": str(e)}), 500
 
+# ✅ Autocomplete skill names
+@app.route('/skills/autocomplete', methods=['GET'])
+def autocomplete_skills():
+    try:
+        query = request.args.get('q', '').strip()
+        limit = max(1, min(request.args.get('limit', 10, type=int), 50))
+        if not query:
+            return jsonify({"error": "Query parameter q required"}), 400
+
+        skill_index.maybe_reload()
+        return jsonify({"query": query, "results": skill_index.lexical.lookup(query, limit=limit)}), 200
+    except Exception as e:
+        logger.error(f"Autocomplete error: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+def resolve_query_vector(query, snapshot):
+    # A confident lexical hit on a catalog skill reuses its stored vector instead of calling Ollama
+    matched = skill_index.lexical.lookup(query, limit=1)
+    position = snapshot.positions.get(matched[0]['skill'].lower()) if matched else None
+    if matched and matched[0]['score'] >= LEXICAL_STRONG_SCORE and position is not None and snapshot.vectors is not None:
+        vector = np.ascontiguousarray(snapshot.vectors[position:position + 1], dtype=np.float32)
+        return vector, matched[0]['skill'], "lexical"
+    return embed_query(query, index_backend(snapshot.metadata)), None, "semantic"
+
+# Upper bound on top_k for the search endpoints; larger requests are capped
+SEARCH_TOP_K_MAX = 50
+
+# ✅ Find similar skills
+@app.route('/skills/similar', methods=['GET'])
+def similar_skills():
+    try:
+        query = request.args.get('q', '').strip()
+        top_k = request.args.get('top_k', 5, type=int)
+        if not query:
+            return jsonify({"error": "Query parameter q required"}), 400
+        if top_k < 1:
+            return jsonify({"error": "top_k must be at least 1"}), 400
+        top_k = min(top_k, SEARCH_TOP_K_MAX)
+
+        snapshot = skill_index.get()
+        if snapshot is None:
+            return jsonify({"error": "Skill index not loaded"}), 503
+
+        vector, matched_skill, path = resolve_query_vector(query, snapshot)
+        if vector is None:
+            return jsonify({"error": "Embedding service unavailable"}), 503
+        _, _, results = search_similar_by_vector(vector, snapshot.index, snapshot.skills, top_k=top_k)
+
+        return jsonify({
+            "query": query,
+            "matched_skill": matched_skill,
+            "path": path,
+            "index_version": snapshot.metadata.get('version'),
+            "results": results
+        }), 200
+    except Exception as e:
+        logger.error(f"Similar skills error: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+# ✅ Find users near a location who can teach a skill
+@app.route('/matches', methods=['GET'])
+def find_matches():
+    try:
+        query = request.args.get('q', '').strip()
+        location_norm = normalize_location(request.args.get('location', ''))
+        top_k = request.args.get('top_k', 5, type=int)
+        if not query or not location_norm:
+            return jsonify({"error": "Query parameters q and location required"}), 400
+        if top_k < 1:
+            return jsonify({"error": "top_k must be at least 1"}), 400
+        top_k = min(top_k, SEARCH_TOP_K_MAX)
+
+        snapshot = skill_index.get()
+        if snapshot is None:
+            return jsonify({"error": "Skill index not loaded"}), 503
+
+        # Catalog rows offered by someone in this location, via the location_norm index
+        offers = db.session.query(Skill.skill_offered_norm, User.id, User.name, User.location) \
+            .join(User, Skill.user_id == User.id) \
+            .filter(User.location_norm == location_norm) \
+            .all()
+        teachers = defaultdict(dict)
+        for skill_offered_norm, user_id, name, location in offers:
+            position = snapshot.positions.get(skill_offered_norm)
+            if position is not None:
+                teachers[position][user_id] = {"id": user_id, "name": name, "location": location}
+
+        plan = "empty"
+        matched_skill, path, results = None, None, []
+        if teachers:
+            vector, matched_skill, path = resolve_query_vector(query, snapshot)
+            if vector is None:
+                return jsonify({"error": "Embedding service unavailable"}), 503
+            results, plan = search_similar_filtered(
+                vector, snapshot.index, snapshot.vectors, snapshot.skills, list(teachers), top_k=top_k
+            )
+            for result in results:
+                result['users'] = list(teachers[result.pop('position')].values())
+
+        return jsonify({
+            "query": query,
+            "location": location_norm,
+            "matched_skill": matched_skill,
+            "path": path,
+            "plan": plan,
+            "index_version": snapshot.metadata.get('version'),
+            "results": results
+        }), 200
+    except Exception as e:
+        logger.error(f"Match search error: {str(e)}")
+        db.session.rollback()
+        return jsonify({"error": str(e)}), 500
+
+# ✅ View user reputation
+@app.route('/users/<int:user_id>/reputation', methods=['GET'])
+def get_reputation(user_id):
+    def build():
+        rep = UserReputation.query.get(user_id)
+        if rep is None and User.query.get(user_id) is None:
+            raise LookupError(user_id)
+        return {
+            "user_id": user_id,
+            "rating_count": rep.rating_count if rep else 0,
+            "rating_sum": rep.rating_sum if rep else 0,
+            "rating_average": rep.average if rep else None,
+            "histogram": rep.histogram if rep else {str(r): 0 for r in range(1, 6)}
+        }
+
+    try:
+        return cached_json(('reputation', user_id), [f'reputation:{user_id}'], build, stamp=reputation_stamp())
+    except LookupError:
+        return jsonify({"error": "User not found"}), 404
+    except Exception as e:
+        logger.error(f"Reputation retrieval error: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+# ✅ Upload resume and extract skills
+@app.route('/users/<int:user_id>/resume', methods=['POST'])
+def upload_resume(user_id):
+    start = time.perf_counter()
+    try:
+        user = User.query.get(user_id)
+        if not user:
+            return jsonify({"error": "User not found"}), 404
+
+        upload = request.files.get('resume')
+        content = upload.read() if upload else b''
+        if not content:
+            return jsonify({"error": "Resume file required"}), 400
+
+        snapshot = skill_index.get()
+        try:
+            resume, skills, added_skills, duplicate = ingest_resume(
+                user_id, content, upload.filename, snapshot.skills if snapshot else ()
+            )
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        db.session.commit()
+
+        if added_skills:
+            skill_index.lexical.add_all(added_skills)
+            index_updates.submit()
+
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        logger.info(f"Processed resume {resume.content_hash[:12]} for user {user_id}: {len(skills)} skills, "
+                    f"{len(added_skills)} new, duplicate={duplicate}, {elapsed_ms:.1f} ms")
+        return jsonify({
+            "resume_id": resume.id,
+            "skills": skills,
+            "added_skills": added_skills,
+            "duplicate": duplicate,
+            "elapsed_ms": round(elapsed_ms, 1)
+        }), 200 if duplicate else 201
+    except Exception as e:
+        logger.error(f"Resume upload error: {str(e)}")
+        db.session.rollback()
+        return jsonify({"error": str(e)}), 500
+
 # ✅ View swaps
 @app.route('/swaps', methods=['GET'])
 def get_swaps():
@@ -99,14 +388,16 @@ def get_swaps():
         if not user_id:
             return jsonify({"error": "User ID required"}), 400
 
-        swaps = Swap.query.filter(
-            (Swap.from_user_id == user_id) | (Swap.to_user_id == user_id)
-        ).all()
+        def build():
+            swaps = Swap.query.filter(
+                (Swap.from_user_id == user_id) | (Swap.to_user_id == user_id)
+            ).all()
+            return [
+                {"id": s.id, "from_user_id": s.from_user_id, "to_user_id": s.to_user_id, "status": s.status}
+                for s in swaps
+            ]
 
-        return jsonify([
-            {"id": s.id, "from_user_id": s.from_user_id, "to_user_id": s.to_user_id, "status": s.status}
-            for s in swaps
-        ]), 200
+        return cached_json(('swaps', user_id), [f'swaps:{user_id}'], build)
     except Exception as e:
         logger.error(f"Swaps retrieval error: {str(e)}")
         return jsonify({"error": str(e)}), 500
@@ -134,6 +425,7 @@ def add_swap():
         swap = Swap(from_user_id=from_user_id, to_user_id=to_user_id, status=status)
         db.session.add(swap)
         db.session.commit()
+        bump_versions(f'swaps:{from_user_id}', f'swaps:{to_user_id}')
 
         return jsonify({
             "id": swap.id,
@@ -163,6 +455,15 @@ def get_swap(id):
         logger.error(f"Swap retrieval error: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
+# Whole numbers 1-5 only: "4" is accepted, 4.7, "abc" and true are not
+def parse_rating(value):
+    # isdigit() accepts superscripts that int() rejects; only plain ASCII digits are ratings
+    if isinstance(value, str) and value.strip().isascii() and value.strip().isdecimal():
+        value = int(value)
+    if isinstance(value, bool) or not isinstance(value, int) or not 1 <= value <= 5:
+        return None
+    return value
+
 # ✅ Add feedback
 @app.route('/feedback', methods=['POST'])
 def add_feedback():
@@ -172,17 +473,47 @@ def add_feedback():
         rating = data.get('rating')
         comment = data.get('comment', None)
 
-        if not swap_id or not rating:
+        if not swap_id or rating is None:
             return jsonify({"error": "Swap ID and rating required"}), 400
 
+        rating = parse_rating(rating)
+        if rating is None:
+            return jsonify({"error": "Rating must be a whole number from 1 to 5"}), 400
+
+        swap = Swap.query.get(swap_id)
+        if not swap:
+            return jsonify({"error": "Swap not found"}), 404
+
+        # Feedback rates the partner the swap request was sent to
         feedback = Feedback(swap_id=swap_id, rating=rating, comment=comment)
         db.session.add(feedback)
+        UserReputation.record(swap.to_user_id, rating)
         db.session.commit()
+        bump_versions(f'feedback:{swap_id}', f'reputation:{swap.to_user_id}', 'users')
         return jsonify({"message": "Feedback added", "feedback_id": feedback.id}), 201
     except Exception as e:
         logger.error(f"Feedback error: {str(e)}")
         db.session.rollback()
         return jsonify({"error": str(e)}), 500
 
+# Backfill: flask --app main rebuild-reputation
+# Running servers see the rebuild through the reputation stamp and revalidate
+@app.cli.command('rebuild-reputation')
+def rebuild_reputation_command():
+    count = rebuild_reputation()
+    print(f"Rebuilt reputation for {count} users")
+
+# Re-index the stored vectors without re-embedding: flask --app main rebuild-index --type sq8
+# Running workers pick the new index up through index_version.json
+@app.cli.command('rebuild-index')
+@click.option('--type', 'index_type', type=click.Choice(['flat', 'sq8']), default=None,
+              help="Index type to build; defaults to the published one")
+def rebuild_index_command(index_type):
+    index_type = index_type or published_index_settings()[0]
+    index = rebuild_index_from_store(index_type)
+    if index is None:
+        raise click.ClickException("Index rebuild failed, see app.log")
+    print(f"Rebuilt {index_type} index over {index.ntotal} vectors")
+
 if __name__ == '__main__':
     app.run(port=5001, debug=True)
@@ -0,0 +1,176 @@
+import hashlib
+import json
+import logging
+import os
+import struct
+import sys
+import time
+import numpy as np
+from app.embeddings import (
+    SKILLS_PATH, INDEX_TYPE, load_vector_store, save_vector_store, build_faiss_index, read_index_version,
+    write_json_atomic, publish_index_version, embedding_fingerprint, fingerprint_mismatch, get_embedding_backend,
+    index_write_lock, atomic_temp_path
+)
+
+logger = logging.getLogger(__name__)
+
+# Layout: magic | header length (uint64 LE) | JSON header | zero padding | raw vectors (C order)
+SNAPSHOT_MAGIC = b'SKSNAP01'
+SNAPSHOT_ALIGNMENT = 64
+SNAPSHOT_CHUNK_ROWS = 65536
+
+
+def _data_offset(header_length):
+    offset = len(SNAPSHOT_MAGIC) + 8 + header_length
+    return (offset + SNAPSHOT_ALIGNMENT - 1) // SNAPSHOT_ALIGNMENT * SNAPSHOT_ALIGNMENT
+
+
+def _chunks(vectors):
+    for start in range(0, len(vectors), SNAPSHOT_CHUNK_ROWS):
+        yield np.ascontiguousarray(vectors[start:start + SNAPSHOT_CHUNK_ROWS]).tobytes()
+
+
+SNAPSHOT_FORMAT = 2
+# Everything in the header is covered except the digests themselves
+DIGEST_FIELDS = ("checksum", "header_checksum")
+
+
+def _canonical_header(header):
+    covered = {key: value for key, value in header.items() if key not in DIGEST_FIELDS}
+    return json.dumps(covered, sort_keys=True, separators=(',', ':')).encode()
+
+
+def _header_checksum(header):
+    return hashlib.sha256(_canonical_header(header)).hexdigest()
+
+
+def _checksum(header, vectors):
+    digest = hashlib.sha256(_canonical_header(header))
+    for chunk in _chunks(vectors):
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def export_snapshot(path):
+    # Under the rebuild lock, so vectors, skills and metadata come from one run
+    with index_write_lock():
+        return _export_snapshot(path)
+
+
+def _export_snapshot(path):
+    vectors = load_vector_store()
+    try:
+        with open(SKILLS_PATH) as f:
+            skills = json.load(f)
+    except (FileNotFoundError, ValueError):
+        skills = None
+    if vectors is None or skills is None or len(vectors) != len(skills):
+        logger.error("No consistent vector store and skill list to export")
+        return False
+
+    metadata = read_index_version()
+    if not metadata.get("fingerprint"):
+        logger.warning("Index has no model fingerprint; replicas will refuse this snapshot until it is rebuilt")
+
+    ids = list(range(len(skills)))
+    header = {
+        "format": SNAPSHOT_FORMAT,
+        "exported_at": time.time(),
+        "version": metadata.get("version"),
+        "fingerprint": metadata.get("fingerprint", {}),
+        "index": {"type": metadata.get("index_type", INDEX_TYPE), "count": len(skills), "dimension": vectors.shape[1]},
+        "dtype": str(vectors.dtype),
+        "shape": list(vectors.shape),
+        "ids": ids,
+        "skills": skills
+    }
+    header["header_checksum"] = _header_checksum(header)
+    header["checksum"] = _checksum(header, vectors)
+    header_bytes = json.dumps(header).encode()
+
+    tmp_path = atomic_temp_path(path)
+    with open(tmp_path, 'wb') as f:
+        f.write(SNAPSHOT_MAGIC)
+        f.write(struct.pack('<Q', len(header_bytes)))
+        f.write(header_bytes)
+        f.write(b'\0' * (_data_offset(len(header_bytes)) - f.tell()))
+        for chunk in _chunks(vectors):
+            f.write(chunk)
+    os.replace(tmp_path, path)
+    logger.info(f"[OK] Exported snapshot {header['version']} ({len(skills)} skills) to {path}")
+    return True
+
+
+def read_snapshot(path):
+    with open(path, 'rb') as f:
+        if f.read(len(SNAPSHOT_MAGIC)) != SNAPSHOT_MAGIC:
+            raise ValueError(f"{path} is not a skill index snapshot")
+        (header_length,) = struct.unpack('<Q', f.read(8))
+        header = json.loads(f.read(header_length))
+    # Zero-copy view of the vector block
+    vectors = np.memmap(path, dtype=header["dtype"], mode='r', offset=_data_offset(header_length),
+                        shape=tuple(header["shape"]))
+    return header, vectors
+
+
+def import_snapshot(path, verify=True):
+    try:
+        header, vectors = read_snapshot(path)
+    except Exception as e:
+        logger.error(f"Could not read snapshot {path}: {str(e)}")
+        return False
+
+    # The header is what the checks below trust, so it is verified first and always;
+    # --no-verify only skips hashing the vector block
+    if header.get("format") != SNAPSHOT_FORMAT:
+        logger.error(f"Refusing snapshot: format {header.get('format')!r}, expected {SNAPSHOT_FORMAT}; re-export it")
+        return False
+    if _header_checksum(header) != header.get("header_checksum"):
+        logger.error("Refusing snapshot: header checksum mismatch")
+        return False
+    if verify and _checksum(header, vectors) != header.get("checksum"):
+        logger.error("Refusing snapshot: checksum mismatch")
+        return False
+
+    # Refreshes the local model digest when the backend is reachable
+    backend = get_embedding_backend()
+    if not backend.available():
+        logger.warning(f"{backend.name} backend unavailable, embedding model digest will not be compared")
+    current = embedding_fingerprint(backend)
+    mismatch = fingerprint_mismatch(header.get("fingerprint", {}), current)
+    if mismatch:
+        logger.error(f"Refusing snapshot {header.get('version')}: {mismatch} is "
+                     f"{header.get('fingerprint', {}).get(mismatch)!r}, this node uses {current.get(mismatch)!r}")
+        return False
+
+    if header["ids"] != list(range(len(header["skills"]))) or len(header["skills"]) != len(vectors):
+        logger.error("Refusing snapshot: ids, skills and vectors are not aligned")
+        return False
+
+    with index_write_lock():
+        if not save_vector_store(vectors, dtype=header["dtype"]):
+            return False
+        index = build_faiss_index(load_vector_store(), index_type=header["index"]["type"])
+        if index is None:
+            return False
+        write_json_atomic(SKILLS_PATH, header["skills"])
+        # Keep the exporter's version so every replica reports the same index_version
+        publish_index_version(index, index_type=header["index"]["type"], vector_dtype=header["dtype"],
+                              fingerprint=header["fingerprint"], version=header["version"])
+    logger.info(f"[OK] Imported snapshot {header['version']} ({len(header['skills'])} skills)")
+    return True
+
+
+if __name__ == '__main__':
+    # python -m app.snapshot export|import <path> [--no-verify]
+    if len(sys.argv) < 3 or sys.argv[1] not in ('export', 'import'):
+        print("Usage: python -m app.snapshot export|import <path> [--no-verify]")
+        sys.exit(1)
+
+    start = time.time()
+    if sys.argv[1] == 'export':
+        ok = export_snapshot(sys.argv[2])
+    else:
+        ok = import_snapshot(sys.argv[2], verify='--no-verify' not in sys.argv[3:])
+    print(f"{sys.argv[1]} {'succeeded' if ok else 'failed'} in {time.time() - start:.2f}s")
+    sys.exit(0 if ok else 1)
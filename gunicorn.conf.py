@@ -0,0 +1,25 @@
+import multiprocessing
+import os
+
+# Production entry point: gunicorn -c gunicorn.conf.py wsgi:app
+bind = os.environ.get('SKILL_SWAP_BIND', '0.0.0.0:5001')
+workers = int(os.environ.get('SKILL_SWAP_WORKERS', multiprocessing.cpu_count()))
+worker_class = 'sync'
+# Import the app (and the index) once in the master, then fork
+preload_app = True
+# Embedding runs on the background index updater, never inside a request
+timeout = 30
+graceful_timeout = 30
+accesslog = '-'
+
+
+def post_fork(server, worker):
+    import faiss
+    from app.routes import app
+    from app.models import db
+
+    # One search thread per worker; the worker count already covers the cores
+    faiss.omp_set_num_threads(1)
+    # Connections opened in the master must not be shared across processes
+    with app.app_context():
+        db.engine.dispose(close=False)
@@ -0,0 +1,60 @@
+import json
+import random
+import string
+import time
+from app.embeddings import SKILLS_PATH
+from app.lexical import LexicalIndex
+
+# Lookup latency for prefixes, exact names and one-typo misspellings.
+# Runs on the real catalog and on a synthetic catalog of SYNTHETIC_COUNT names.
+SYNTHETIC_COUNT = 50000
+QUERY_COUNT = 2000
+
+
+def synthetic_names(count, rng):
+    words = [''.join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 9))) for _ in range(count // 4)]
+    return [" ".join(rng.sample(words, rng.randint(1, 3))) for _ in range(count)]
+
+
+def typo(name, rng):
+    if len(name) < 3:
+        return name
+    i = rng.randrange(len(name))
+    return name[:i] + name[i + 1:]
+
+
+def make_queries(names, rng):
+    queries = []
+    for _ in range(QUERY_COUNT):
+        name = rng.choice(names)
+        kind = rng.randrange(3)
+        if kind == 0:
+            queries.append(name[:max(1, len(name) // 2)])
+        elif kind == 1:
+            queries.append(name)
+        else:
+            queries.append(typo(name, rng))
+    return queries
+
+
+def bench(label, names, rng):
+    start = time.perf_counter()
+    index = LexicalIndex(names)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    timings = []
+    for query in make_queries(names, rng):
+        start = time.perf_counter()
+        index.lookup(query, limit=10)
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    p50 = timings[len(timings) // 2]
+    p99 = timings[int(len(timings) * 0.99)]
+    print(f"{label:<22} {len(index):>7} skills  build {build_ms:8.1f} ms  p50 {p50:.3f} ms  p99 {p99:.3f} ms")
+
+
+if __name__ == '__main__':
+    rng = random.Random(0)
+    with open(SKILLS_PATH) as f:
+        bench('catalog', json.load(f), rng)
+    bench('synthetic', synthetic_names(SYNTHETIC_COUNT, rng), rng)
@@ -0,0 +1,49 @@
+import random
+import string
+import sys
+import time
+from app.embeddings import EMBEDDING_BACKENDS, get_embedding_backend
+
+# Embedding throughput per backend: one batched call over BATCH_COUNT skill names,
+# plus single-text latency as seen by query embedding. Backends that are not
+# installed or not reachable are reported and skipped.
+# python -m scripts.bench_backends [backend ...]
+BATCH_COUNT = 2000
+QUERY_COUNT = 50
+
+
+def synthetic_names(count, rng):
+    words = [''.join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 9))) for _ in range(count // 4)]
+    return [" ".join(rng.sample(words, rng.randint(1, 3))) for _ in range(count)]
+
+
+def bench(name, texts):
+    backend = get_embedding_backend(name)
+    if not backend.available():
+        print(f"{name:<22} unavailable, skipped")
+        return
+
+    # First call pays model loading; keep it out of the steady-state numbers
+    backend.embed(texts[:1])
+
+    start = time.perf_counter()
+    vectors = backend.embed(texts)
+    batch_seconds = time.perf_counter() - start
+    if vectors is None:
+        print(f"{name:<22} embedding failed")
+        return
+
+    timings = []
+    for text in texts[:QUERY_COUNT]:
+        start = time.perf_counter()
+        backend.embed([text])
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    print(f"{name:<22} {backend.model:<22} {vectors.shape[1]:>5}D  "
+          f"{len(texts) / batch_seconds:10.1f} texts/s  single p50 {timings[len(timings) // 2]:.2f} ms")
+
+
+if __name__ == '__main__':
+    texts = synthetic_names(BATCH_COUNT, random.Random(0))
+    for name in sys.argv[1:] or EMBEDDING_BACKENDS:
+        bench(name, texts)
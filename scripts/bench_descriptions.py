@@ -0,0 +1,64 @@
+import json
+import time
+import requests
+from app import embeddings
+from app.embeddings import OLLAMA_URL, SKILLS_PATH, generate_batch_descriptions, generate_single_description
+
+# Compares the previous sequential free-text batching against the concurrent JSON-schema path.
+# Needs a running Ollama with phi3; reads the skill catalog from data/embeddings/skills.json.
+
+
+def legacy_batch_descriptions(skills, batch_size=5):
+    # The pre-JSON implementation: sequential batches, numbered text output, fuzzy name matching
+    descriptions = {}
+    for i in range(0, len(skills), batch_size):
+        batch = skills[i:i + batch_size]
+        batch_text = "\n".join([f"{j + 1}. {skill}" for j, skill in enumerate(batch)])
+        data = {
+            "model": "phi3",
+            "prompt": f"""Provide brief descriptions for these skills (one sentence each):
+{batch_text}
+
+Format your response as:
+1. [Skill]: [Description]
+2. [Skill]: [Description]
+etc.""",
+            "stream": False,
+            "options": {"temperature": 0.1, "num_predict": 200, "top_k": 3, "top_p": 0.8}
+        }
+        try:
+            response = requests.post(f"{OLLAMA_URL}/generate", json=data, timeout=15)
+            text = response.json().get("response", "") if response.status_code == 200 else ""
+        except Exception:
+            text = ""
+        for line in text.split('\n'):
+            line = line.strip()
+            if ':' in line and any(char.isdigit() for char in line[:5]):
+                skill_part, desc_part = line.split(':', 1)
+                skill_part = skill_part.strip().split('.', 1)[-1].strip().strip('[]')
+                for skill in batch:
+                    if skill.lower() in skill_part.lower() or skill_part.lower() in skill.lower():
+                        descriptions[skill] = desc_part.strip()
+                        break
+
+    missing = [skill for skill in skills if skill not in descriptions]
+    for skill in missing:
+        descriptions[skill] = generate_single_description(skill)
+    return descriptions, len(missing)
+
+
+if __name__ == '__main__':
+    with open(SKILLS_PATH) as f:
+        skills = json.load(f)
+    print(f"Describing {len(skills)} skills")
+
+    start = time.time()
+    _, legacy_fallbacks = legacy_batch_descriptions(skills)
+    legacy_time = time.time() - start
+    print(f"legacy text/sequential  {len(skills) / legacy_time:6.2f} desc/s  "
+          f"fallback rate {legacy_fallbacks / len(skills):.0%} ({legacy_fallbacks} calls)")
+
+    generate_batch_descriptions(skills)
+    stats = embeddings.description_stats
+    print(f"json/concurrent (bs={stats['batch_size']:>2})  {stats['descriptions_per_second']:6.2f} desc/s  "
+          f"fallback rate {stats['fallback_rate']:.0%} ({stats['fallback_calls']} calls)")
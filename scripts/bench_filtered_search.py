@@ -0,0 +1,76 @@
+import os
+import tempfile
+import time
+import numpy as np
+import faiss
+from app.embeddings import plan_filtered_search, search_similar_filtered
+
+# Latency of location-filtered search across filter selectivities: over-fetch then
+# filter in Python vs. each plan of search_similar_filtered, forced, end to end
+# (dedup, selector construction, result formatting). Vectors are read from an .npy
+# memmap as in serving. The last column says whether the planner picked the faster plan.
+CONFIGS = [(50000, 1024), (50000, 256), (500000, 256)]
+QUERIES = 50
+REPEATS = 3
+TOP_K = 5
+OVERFETCH = 10
+SELECTIVITIES = [0.0001, 0.001, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2]
+
+
+def overfetch_search(index, query, allowed_set, k):
+    _, indices = index.search(query, min(k * OVERFETCH, index.ntotal))
+    return [idx for idx in indices[0] if idx in allowed_set][:k]
+
+
+def timed(fn, queries):
+    # Best of REPEATS passes, in ms per query
+    best, out = None, None
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        out = [fn(queries[i:i + 1]) for i in range(len(queries))]
+        elapsed = (time.perf_counter() - start) * 1000 / len(queries)
+        best = elapsed if best is None else min(best, elapsed)
+    return best, out
+
+
+def bench(count, dimension, rng, tmp):
+    vectors = rng.standard_normal((count, dimension)).astype(np.float32)
+    faiss.normalize_L2(vectors)
+    index = faiss.IndexFlatIP(dimension)
+    index.add(vectors)
+    path = os.path.join(tmp, f"vectors-{count}-{dimension}.npy")
+    np.save(path, vectors)
+    del vectors
+    vectors = np.load(path, mmap_mode='r')
+    queries = rng.standard_normal((QUERIES, dimension)).astype(np.float32)
+    faiss.normalize_L2(queries)
+    skills = [f"skill-{i}" for i in range(count)]
+
+    print(f"\n{count} x {dimension}, top_k={TOP_K}, over-fetch x{OVERFETCH}")
+    print(f"{'selectivity':>11} {'ids':>6} {'overfetch ms':>13} {'recall':>7} "
+          f"{'exact ms':>9} {'selector ms':>12} {'plan':>12} {'fastest':>8}")
+    for selectivity in SELECTIVITIES:
+        allowed = rng.choice(count, size=max(1, int(count * selectivity)), replace=False)
+        allowed_set = set(allowed.tolist())
+        k = min(TOP_K, allowed.size)
+
+        def run(plan):
+            return lambda q: [r['position'] for r in search_similar_filtered(
+                q, index, vectors, skills, allowed, top_k=k, plan=plan)[0]]
+
+        over_ms, over_hits = timed(lambda q: overfetch_search(index, q, allowed_set, k), queries)
+        exact_ms, exact_hits = timed(run('exact'), queries)
+        selector_ms, _ = timed(run('filtered_ann'), queries)
+        recall = sum(len(set(o) & set(t)) for o, t in zip(over_hits, exact_hits)) / (k * QUERIES)
+        plan = plan_filtered_search(allowed.size, count, dimension)
+        fastest = 'exact' if exact_ms <= selector_ms else 'filtered_ann'
+        print(f"{selectivity:>11} {allowed.size:>6} {over_ms:>13.2f} {recall:>7.2f} "
+              f"{exact_ms:>9.2f} {selector_ms:>12.2f} {plan:>12} {'yes' if plan == fastest else 'no':>8}")
+
+
+if __name__ == '__main__':
+    faiss.omp_set_num_threads(1)
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        for count, dimension in CONFIGS:
+            bench(count, dimension, rng, tmp)
@@ -0,0 +1,68 @@
+import os
+import tempfile
+import time
+import numpy as np
+import faiss
+from app.embeddings import load_vector_store, save_vector_store, build_faiss_index
+
+# Compares the float32 flat index against the float16 store and the int8 (sq8) index.
+# Uses data/embeddings/skill_vectors.npy when present, otherwise synthetic 1024-d vectors.
+SYNTHETIC_COUNT = 50000
+DIMENSION = 1024
+QUERY_COUNT = 200
+TOP_K = 10
+
+
+def load_or_generate_vectors():
+    vectors = load_vector_store()
+    if vectors is not None and len(vectors) >= TOP_K:
+        print(f"Using vector store: {vectors.shape[0]}x{vectors.shape[1]} {vectors.dtype}")
+        return np.ascontiguousarray(vectors, dtype=np.float32)
+    print(f"Using synthetic vectors: {SYNTHETIC_COUNT}x{DIMENSION}")
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((SYNTHETIC_COUNT, DIMENSION)).astype(np.float32)
+    faiss.normalize_L2(vectors)
+    return vectors
+
+
+def make_queries(vectors):
+    rng = np.random.default_rng(1)
+    picks = rng.choice(len(vectors), size=min(QUERY_COUNT, len(vectors)), replace=False)
+    queries = vectors[picks] + 0.05 * rng.standard_normal((len(picks), vectors.shape[1])).astype(np.float32)
+    faiss.normalize_L2(queries)
+    return queries
+
+
+def recall_at_k(truth, found):
+    hits = sum(len(set(t) & set(f)) for t, f in zip(truth, found))
+    return hits / truth.size
+
+
+def run(label, store, index_type, workdir, queries, truth):
+    start = time.time()
+    index = build_faiss_index(store, index_type=index_type, index_path=os.path.join(workdir, f"{label}.faiss"))
+    build_time = time.time() - start
+    index_bytes = faiss.serialize_index(index).nbytes
+    _, found = index.search(queries, TOP_K)
+    recall = recall_at_k(truth, found) if truth is not None else 1.0
+    print(f"{label:<14} store={store.nbytes / 2**20:8.1f}MiB index={index_bytes / 2**20:8.1f}MiB "
+          f"build={build_time:6.2f}s recall@{TOP_K}={recall:.4f}")
+    return found
+
+
+if __name__ == '__main__':
+    vectors = load_or_generate_vectors()
+    queries = make_queries(vectors)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        f32_path = os.path.join(workdir, 'vectors_f32.npy')
+        f16_path = os.path.join(workdir, 'vectors_f16.npy')
+        save_vector_store(vectors, path=f32_path, dtype='float32')
+        save_vector_store(vectors, path=f16_path, dtype='float16')
+        f32_store = load_vector_store(f32_path)
+        f16_store = load_vector_store(f16_path)
+
+        truth = run('flat/float32', f32_store, 'flat', workdir, queries, None)
+        run('flat/float16', f16_store, 'flat', workdir, queries, truth)
+        run('sq8/float32', f32_store, 'sq8', workdir, queries, truth)
+        run('sq8/float16', f16_store, 'sq8', workdir, queries, truth)
@@ -0,0 +1,28 @@
+import sys
+import time
+import requests
+from concurrent.futures import ThreadPoolExecutor
+
+# Read-heavy load against a running server, e.g. gunicorn with different SKILL_SWAP_WORKERS:
+#   python -m scripts.bench_serving http://127.0.0.1:5001 /register /readyz
+CONCURRENCY = 32
+DURATION_SECONDS = 10
+
+
+def worker(base_url, paths, stop_at):
+    session = requests.Session()
+    done = 0
+    while time.time() < stop_at:
+        for path in paths:
+            session.get(f"{base_url}{path}", timeout=30)
+            done += 1
+    return done
+
+
+if __name__ == '__main__':
+    base_url = sys.argv[1] if len(sys.argv) > 1 else "http://127.0.0.1:5001"
+    paths = sys.argv[2:] or ['/register', '/swaps?user_id=1', '/readyz']
+    stop_at = time.time() + DURATION_SECONDS
+    with ThreadPoolExecutor(max_workers=CONCURRENCY) as executor:
+        total = sum(executor.map(lambda _: worker(base_url, paths, stop_at), range(CONCURRENCY)))
+    print(f"{total} requests in {DURATION_SECONDS}s: {total / DURATION_SECONDS:.0f} req/s at concurrency {CONCURRENCY}")
@@ -0,0 +1,86 @@
+import os
+import random
+import string
+import sys
+import tempfile
+import time
+import tracemalloc
+from flask import Flask
+from app.models import db, Skill, normalize_skill
+from app.embeddings import gather_unique_skills
+
+# Time and peak Python memory of the skill gather step on a throwaway SQLite
+# database: the previous ORM load plus Python dedup loop vs. the SQL GROUP BY
+# over skill_offered_norm. python -m scripts.bench_skill_gather [rows]
+ROW_COUNT = 1000000
+DISTINCT_COUNT = 20000
+INSERT_CHUNK = 50000
+
+
+def legacy_gather_unique_skills():
+    # The previous implementation: every row as an ORM object, deduplicated in Python
+    all_skills = [skill.skill_offered for skill in Skill.query.all()]
+
+    unique_skills = []
+    seen = set()
+    for skill in all_skills:
+        skill_clean = skill.strip()
+        if skill_clean and skill_clean.lower() not in seen:
+            seen.add(skill_clean.lower())
+            unique_skills.append(skill_clean)
+    return unique_skills
+
+
+def variant(name, rng):
+    # Same skill as users type it: random casing and stray whitespace
+    name = name.upper() if rng.random() < 0.1 else name.title() if rng.random() < 0.3 else name
+    return " " * rng.randint(0, 1) + name + " " * rng.randint(0, 1)
+
+
+def populate(row_count, rng):
+    names = list({
+        " ".join(''.join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 9))) for _ in range(rng.randint(1, 2)))
+        for _ in range(DISTINCT_COUNT)
+    })
+    for start in range(0, row_count, INSERT_CHUNK):
+        rows = []
+        for _ in range(min(INSERT_CHUNK, row_count - start)):
+            skill = variant(rng.choice(names), rng)
+            rows.append({"user_id": rng.randint(1, row_count // 10 or 1), "skill_offered": skill,
+                         "skill_offered_norm": normalize_skill(skill)})
+        db.session.execute(Skill.__table__.insert(), rows)
+    db.session.commit()
+
+
+def measure(label, gather):
+    # Timed untraced; tracemalloc slows allocation-heavy code, so the peak is a separate run
+    db.session.expunge_all()
+    start = time.perf_counter()
+    skills = gather()
+    seconds = time.perf_counter() - start
+
+    db.session.expunge_all()
+    tracemalloc.start()
+    gather()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<10} {len(skills):>7} unique  {seconds:7.2f} s  peak {peak / 2 ** 20:8.1f} MiB")
+    return skills
+
+
+if __name__ == '__main__':
+    row_count = int(sys.argv[1]) if len(sys.argv) > 1 else ROW_COUNT
+    with tempfile.TemporaryDirectory() as tmp:
+        bench_app = Flask(__name__)
+        bench_app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        db.init_app(bench_app)
+        with bench_app.app_context():
+            db.create_all()
+            start = time.perf_counter()
+            populate(row_count, random.Random(0))
+            print(f"{row_count} skill rows inserted in {time.perf_counter() - start:.1f} s")
+
+            legacy = measure('legacy', legacy_gather_unique_skills)
+            current = measure('grouped', gather_unique_skills)
+            assert sorted(s.lower() for s in legacy) == sorted(s.lower() for s in current)
+            db.session.remove()
@@ -1,13 +1,75 @@
 import streamlit as st
 import requests
+import hashlib
 import json
-import pdfplumber
-import os
+from requests.adapters import HTTPAdapter
 
 st.set_page_config(page_title="Skill Swap Platform", layout="wide")
 
 API_BASE = "http://localhost:5001"
-RESUME_DIR = "data/resumes"
+FETCH_TTL_SECONDS = 30
+
+
+# One pooled HTTP session for every rerun and every browser session
+@st.cache_resource
+def get_session():
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+# Shared version counters; bumping one changes the key of the cached fetches below
+@st.cache_resource
+def cache_versions():
+    return {}
+
+
+def invalidate(*keys):
+    versions = cache_versions()
+    for key in keys:
+        versions[key] = versions.get(key, 0) + 1
+
+
+@st.cache_data(ttl=FETCH_TTL_SECONDS, show_spinner=False)
+def fetch_users(version):
+    res = get_session().get(f"{API_BASE}/register", timeout=10)
+    res.raise_for_status()
+    return res.json()
+
+
+@st.cache_data(ttl=FETCH_TTL_SECONDS, show_spinner=False)
+def fetch_swaps(user_id, version):
+    res = get_session().get(f"{API_BASE}/swaps", params={"user_id": user_id}, timeout=10)
+    res.raise_for_status()
+    return res.json()
+
+
+def get_users():
+    return fetch_users(cache_versions().get("users", 0))
+
+
+def get_swaps(user_id):
+    return fetch_swaps(user_id, cache_versions().get(f"swaps:{user_id}", 0))
+
+
+# Uploads are keyed by (user, content hash) so reruns never re-send the same file
+def upload_resume(user_id, uploaded):
+    content = uploaded.getvalue()
+    key = (user_id, hashlib.sha256(content).hexdigest())
+    uploads = st.session_state.setdefault("resume_uploads", {})
+    if key not in uploads:
+        res = get_session().post(
+            f"{API_BASE}/users/{user_id}/resume",
+            files={"resume": (uploaded.name, content, "application/pdf")},
+            timeout=60
+        )
+        if res.status_code not in (200, 201):
+            raise RuntimeError(res.json().get("error"))
+        uploads[key] = res.json()
+    return uploads[key]
+
 
 st.sidebar.title("📂 Skill Swap Navigation")
 page = st.sidebar.radio("Go to", [
@@ -32,8 +94,9 @@ elif page == "📝 Register":
         submitted = st.form_submit_button("Register")
         if submitted:
             if name and location:
-                res = requests.post(f"{API_BASE}/register", json={"name": name, "location": location})
+                res = get_session().post(f"{API_BASE}/register", json={"name": name, "location": location})
                 if res.status_code == 201:
+                    invalidate("users")
                     st.success(f"Registered successfully. Your ID: {res.json()['id']}")
                 else:
                     st.error(f"Failed to register: {res.json().get('error')}")
@@ -42,26 +105,29 @@ elif page == "📝 Register":
 
 elif page == "📤 Upload Resume":
     st.title("📤 Upload Resume to Extract Skills")
-    uploaded = st.file_uploader("Upload a PDF resume", type="pdf")
-    if uploaded:
-        os.makedirs(RESUME_DIR, exist_ok=True)
-        path = os.path.join(RESUME_DIR, uploaded.name)
-        with open(path, "wb") as f:
-            f.write(uploaded.read())
-        st.success("Resume uploaded!")
-
-        # Extract skills from PDF
-        common_skills = ["python", "machine learning", "deep learning", "data science", "sql", "flask", "streamlit", "nlp", "computer vision"]
-        extracted = []
-        with pdfplumber.open(path) as pdf:
-            text = " ".join([page.extract_text() or "" for page in pdf.pages]).lower()
-            extracted = [skill for skill in common_skills if skill in text]
-
-        if extracted:
-            st.subheader("✅ Extracted Skills:")
-            st.write(", ".join(extracted))
+    with st.form("upload_resume_form"):
+        user_id = st.number_input("Your User ID", min_value=1, step=1, value=None, placeholder="Enter your user ID")
+        uploaded = st.file_uploader("Upload a PDF resume", type="pdf")
+        submitted = st.form_submit_button("Upload Resume")
+    if submitted:
+        if not (uploaded and user_id):
+            st.warning("User ID and resume required.")
         else:
-            st.warning("No known skills found in resume.")
+            try:
+                result = upload_resume(int(user_id), uploaded)
+            except Exception as e:
+                st.error(f"Failed to upload resume: {e}")
+            else:
+                st.success("Resume already processed." if result["duplicate"] else "Resume uploaded!")
+
+                extracted = result["skills"]
+                if extracted:
+                    st.subheader("✅ Extracted Skills:")
+                    st.write(", ".join(extracted))
+                    if result["added_skills"]:
+                        st.caption(f"Added to your profile: {', '.join(result['added_skills'])}")
+                else:
+                    st.warning("No known skills found in resume.")
 
 elif page == "💼 Add Skill":
     st.title("💼 Add Your Skills")
@@ -71,7 +137,7 @@ elif page == "💼 Add Skill":
         skill_wanted = st.text_input("Skill you want to learn (optional)")
         submitted = st.form_submit_button("Add Skill")
         if submitted:
-            res = requests.post(f"{API_BASE}/skills", json={
+            res = get_session().post(f"{API_BASE}/skills", json={
                 "user_id": user_id,
                 "skill_offered": skill_offered,
                 "skill_wanted": skill_wanted
@@ -91,11 +157,12 @@ elif page == "🔁 Swap Match":
             if from_user == to_user:
                 st.error("You cannot send a swap request to yourself!")
             else:
-                res = requests.post(f"{API_BASE}/swaps", json={
+                res = get_session().post(f"{API_BASE}/swaps", json={
                     "from_user_id": from_user,
                     "to_user_id": to_user
                 })
                 if res.status_code == 201:
+                    invalidate(f"swaps:{from_user}", f"swaps:{to_user}")
                     st.success("Swap request sent!")
                 else:
                     st.error(f"Error: {res.json().get('error')}")
@@ -105,13 +172,16 @@ elif page == "🤝 Suggested Swaps":
     user_id = st.number_input("Enter your User ID", min_value=1, step=1)
     if user_id:
         try:
-            all_users = requests.get(f"{API_BASE}/register").json()
-            your_swaps = requests.get(f"{API_BASE}/swaps", params={"user_id": user_id}).json()
+            all_users = get_users()
+            your_swaps = get_swaps(user_id)
             swapped_ids = set(s['to_user_id'] for s in your_swaps if s['from_user_id'] == user_id)
             possible = [u for u in all_users if u['id'] != user_id and u['id'] not in swapped_ids]
+            # Best-rated partners first, then those with the most ratings
+            possible.sort(key=lambda u: (u.get('rating_average') or 0, u.get('rating_count', 0)), reverse=True)
             st.subheader("You can send swaps to:")
             for u in possible:
-                st.markdown(f"- {u['name']} (ID: {u['id']}, {u['location']})")
+                rating = f", ⭐ {u['rating_average']:.1f} ({u['rating_count']})" if u.get('rating_average') else ""
+                st.markdown(f"- {u['name']} (ID: {u['id']}, {u['location']}{rating})")
             if not possible:
                 st.info("No new users available for swap.")
         except Exception as e:
@@ -122,15 +192,13 @@ elif page == "📜 View Swaps":
     user_id = st.number_input("Enter your User ID to view swaps", min_value=1, step=1)
     if user_id:
         try:
-            res = requests.get(f"{API_BASE}/swaps", params={"user_id": user_id})
-            if res.status_code == 200:
-                swaps = res.json()
-                if swaps:
-                    for s in swaps:
-                        st.write(f"Swap ID: {s['id']} | From: {s['from_user_id']} | To: {s['to_user_id']} | Status: {s['status']}")
-                else:
-                    st.info("No swaps found.")
+            swaps = get_swaps(user_id)
+            if swaps:
+                for s in swaps:
+                    st.write(f"Swap ID: {s['id']} | From: {s['from_user_id']} | To: {s['to_user_id']} | Status: {s['status']}")
             else:
-                st.error(f"Failed to load swaps: {res.json().get('error')}")
+                st.info("No swaps found.")
+        except requests.HTTPError as e:
+            st.error(f"Failed to load swaps: {e.response.json().get('error')}")
         except Exception as e:
             st.error(f"Request failed: {e}")
@@ -1,7 +1,10 @@
+import csv
 import logging
 import os
-import pdfplumber
-from app.models import db, Skill, User, init_db  # Import models for direct DB access
+import sys
+from app.models import db, User, init_db  # Import models for direct DB access
+from app.resumes import ingest_resume
+from app.embeddings import update_embeddings_incremental, gather_unique_skills
 from flask import Flask  # For app context, but not as a full app
 
 # Set up logging
@@ -19,29 +22,22 @@ app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{os.path.join(os.path.dirnam
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 db.init_app(app)
 
-def extract_skills_from_pdf(pdf_path):
-    try:
-        with pdfplumber.open(pdf_path) as pdf:
-            text = "".join(page.extract_text() for page in pdf.pages if page.extract_text())
-            # Simple skill extraction (customize based on resume format)
-            skills = []
-            common_skills = ['python', 'java', 'sql', 'html', 'css', 'javascript']  # Example skill list
-            for skill in common_skills:
-                if skill.lower() in text.lower():
-                    skills.append(skill.capitalize())
-            logger.debug(f"Extracted skills from {pdf_path}: {skills}")
-            return skills
-    except Exception as e:
-        logger.error(f"Error extracting skills from {pdf_path}: {str(e)}")
-        return []
+RESUMES_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'data', 'resumes'))
 
-def process_resumes():
-    resumes_dir = os.path.join(os.path.dirname(__file__), '..', '..', 'data', 'resumes')
-    resumes_dir = os.path.abspath(resumes_dir)  # Convert to absolute path for clarity
-    logger.info(f"Processing resumes from directory: {resumes_dir}")
-    if not os.path.exists(resumes_dir):
-        os.makedirs(resumes_dir)
-        logger.debug(f"Created resumes directory: {resumes_dir}")
+def read_mapping(mapping_path):
+    # One "<file>,<user_id>" line per resume; relative files are looked up in data/resumes
+    assignments = {}
+    with open(mapping_path, newline='') as f:
+        for row in csv.reader(f):
+            if not row or row[0].startswith('#'):
+                continue
+            filename, user_id = row[0].strip(), int(row[1])
+            assignments[os.path.join(RESUMES_DIR, filename)] = user_id
+    return assignments
+
+def process_resumes(assignments):
+    """Ingest each resume for the user it is mapped to: {path: user_id}."""
+    logger.info(f"Processing {len(assignments)} resumes")
 
     with app.app_context():
         # Ensure tables exist
@@ -53,28 +49,52 @@ def process_resumes():
             logger.debug("Database tables already exist")
 
         init_db()  # Ensure consistency with models.py
-        for filename in os.listdir(resumes_dir):
-            if filename.lower().endswith('.pdf'):
-                pdf_path = os.path.join(resumes_dir, filename)
-                skills = extract_skills_from_pdf(pdf_path)
-                if skills:
-                    user = User.query.first()  # Check for existing user
-                    if not user:
-                        logger.warning("No users found, creating a default user")
-                        user = User(name="DefaultUser", location="Unknown")
-                        db.session.add(user)
-                        db.session.commit()
-                    user_id = user.id
-                    for skill in skills:
-                        existing_skill = Skill.query.filter_by(user_id=user_id, skill_offered=skill).first()
-                        if not existing_skill:
-                            new_skill = Skill(user_id=user_id, skill_offered=skill)
-                            db.session.add(new_skill)
-                    db.session.commit()
-                    logger.info(f"Processed resume {filename} and added skills for user {user_id}")
+        # Match against the whole catalog, as the API upload does
+        vocabulary = tuple(gather_unique_skills())
+        added = 0
+        processed = 0
+        for path, user_id in assignments.items():
+            filename = os.path.basename(path)
+            if not User.query.get(user_id):
+                logger.error(f"Skipping {filename}: user {user_id} not found")
+                continue
+            if not os.path.isfile(path):
+                logger.error(f"Skipping {filename}: file not found")
+                continue
+            with open(path, 'rb') as f:
+                content = f.read()
+            try:
+                _, _, new_skills, duplicate = ingest_resume(user_id, content, filename, vocabulary)
+            except ValueError as e:
+                logger.error(f"Skipping {filename}: {str(e)}")
+                continue
+            processed += 1
+            if duplicate:
+                logger.debug(f"Skipping already processed resume {filename}")
+                continue
+            db.session.commit()
+            added += len(new_skills)
+            logger.info(f"Processed resume {filename} and added {len(new_skills)} skills for user {user_id}")
+
+    # One index update for the whole run
+    if added:
+        update_embeddings_incremental()
+    return processed == len(assignments)
+
+USAGE = ("Usage: python -m ui.scripts.extract_skills <user_id> <resume.pdf>\n"
+         "       python -m ui.scripts.extract_skills --mapping <mapping.csv>")
 
 if __name__ == '__main__':
-    # Test the script independently
+    # Each resume is credited to exactly the user it names: one file and its owner,
+    # or a CSV mapping files in data/resumes to user IDs
+    if len(sys.argv) != 3:
+        print(USAGE)
+        sys.exit(1)
+    if sys.argv[1] == '--mapping':
+        assignments = read_mapping(sys.argv[2])
+    else:
+        assignments = {os.path.abspath(sys.argv[2]): int(sys.argv[1])}
     logger.info("Extract_skills.py test starting.")
-    process_resumes()
-    logger.info("Extract_skills.py test completed. Check app.log and data/resumes/ for results.")
\ No newline at end of file
+    ok = process_resumes(assignments)
+    logger.info("Extract_skills.py test completed. Check app.log and data/resumes/ for results.")
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,5 @@
+from app.routes import app, warm_up
+
+# Load the FAISS index and skill list before gunicorn forks (preload_app),
+# so every worker shares the same pages copy-on-write
+warm_up()